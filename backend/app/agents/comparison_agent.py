@@ -1,26 +1,35 @@
 from crewai import Agent
+from types import MappingProxyType
 from app.tools.search_tool import search_tool # Import the tool instance
+from app.core.config import settings
+
+# Prompt text shared by every expert_reviewer agent
+_COMPARISON_ROLE = "Expert Car Reviewer"
+_COMPARISON_GOAL = (
+    "Find and summarize all relevant information about two vehicle models. "
+    "Focus on technical specifications, expert reviews, reliability, and common problems."
+)
+_COMPARISON_BACKSTORY = (
+    "You are a world-renowned automotive journalist known for your "
+    "in-depth and unbiased reviews. You have a knack for digging deep into "
+    "the details and presenting a clear, comprehensive comparison for consumers."
+)
+
+_COMPARISON_CONFIG = MappingProxyType({
+    "role": _COMPARISON_ROLE,
+    "goal": _COMPARISON_GOAL,
+    "backstory": _COMPARISON_BACKSTORY,
+    "tools": [search_tool], # Assign the new Serper tool
+    "allow_delegation": False,
+    "verbose": settings.VERBOSE
+})
 
 class VehicleComparisonAgent:
     def expert_reviewer(self, llm=None) -> Agent:
         """
         Creates an agent that acts as an expert car reviewer.
         """
-        agent_config = {
-            "role": "Expert Car Reviewer",
-            "goal": (
-                "Find and summarize all relevant information about two vehicle models. "
-                "Focus on technical specifications, expert reviews, reliability, and common problems."
-            ),
-            "backstory": (
-                "You are a world-renowned automotive journalist known for your "
-                "in-depth and unbiased reviews. You have a knack for digging deep into "
-                "the details and presenting a clear, comprehensive comparison for consumers."
-            ),
-            "tools": [search_tool], # Assign the new Serper tool
-            "allow_delegation": False,
-            "verbose": True
-        }
+        agent_config = dict(_COMPARISON_CONFIG)
         
         # Add LLM if provided
         if llm is not None:
@@ -1,34 +1,43 @@
 # app/agents/details_extractor_agent.py
 from crewai import Agent
+from types import MappingProxyType
 from app.tools.sync_ad_details_tool import SyncAdDetailsExtractorTool
+from app.core.config import settings
+
+# Prompt text shared by every details_extractor agent
+_EXTRACTOR_ROLE = "Ad Data Extractor"
+_EXTRACTOR_GOAL = (
+    "Extract key information from vehicle advertisement URLs including "
+    "price, location, mileage, year, and other relevant details."
+)
+_EXTRACTOR_BACKSTORY = (
+    "You are an expert data extraction specialist who extracts real vehicle "
+    "advertisement data from Sri Lankan websites like ikman.lk and riyasewana.com. "
+    "You use efficient concurrent HTTP requests and lxml for HTML parsing "
+    "to extract accurate pricing, locations, mileage figures, and vehicle specifications. "
+    "You are skilled at handling various website structures, parsing HTML content, "
+    "and cleaning extracted data for consistent formatting and reliable results."
+)
+
+_EXTRACTOR_CONFIG = MappingProxyType({
+    "role": _EXTRACTOR_ROLE,
+    "goal": _EXTRACTOR_GOAL,
+    "backstory": _EXTRACTOR_BACKSTORY,
+    "allow_delegation": False,
+    "verbose": settings.VERBOSE
+})
 
 class AdDetailsExtractorAgent:
     def details_extractor(self, llm=None) -> Agent:
         """
         Creates an agent that extracts structured data from vehicle advertisements.
         """
-        agent_config = {
-            "role": "Ad Data Extractor",
-            "goal": (
-                "Extract key information from vehicle advertisement URLs including "
-                "price, location, mileage, year, and other relevant details."
-            ),
-            "backstory": (
-                "You are an expert data extraction specialist who extracts real vehicle "
-                "advertisement data from Sri Lankan websites like ikman.lk and riyasewana.com. "
-                "You use efficient HTTP requests with requests library and BeautifulSoup for HTML parsing "
-                "to extract accurate pricing, locations, mileage figures, and vehicle specifications. "
-                "You are skilled at handling various website structures, parsing HTML content, "
-                "and cleaning extracted data for consistent formatting and reliable results."
-            ),
-            "tools": [SyncAdDetailsExtractorTool()],
-            "allow_delegation": False,
-            "verbose": True
-        }
+        agent_config = dict(_EXTRACTOR_CONFIG)
+        # Tool instances hold per-run state, so each agent gets its own
+        agent_config["tools"] = [SyncAdDetailsExtractorTool()]
         
         # Add LLM if provided
         if llm is not None:
             agent_config["llm"] = llm
         
         return Agent(**agent_config)
-
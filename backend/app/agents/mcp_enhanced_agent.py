@@ -4,11 +4,85 @@ This agent leverages MCP OpenAI server for enhanced analysis capabilities.
 """
 
 from crewai import Agent
-from app.tools.mcp_openai_tool import create_mcp_openai_tool
+from functools import cached_property, lru_cache
+from types import MappingProxyType
 import structlog
+from app.core.config import settings
 
 logger = structlog.get_logger()
 
+# Static prompt text, kept out of the factories so every agent built from
+# them sends the same system prompt prefix
+_ENHANCED_COMPARISON_ROLE = "MCP Enhanced Vehicle Analyst"
+_ENHANCED_COMPARISON_GOAL = "Provide comprehensive vehicle analysis using advanced AI capabilities through MCP OpenAI server"
+_ENHANCED_COMPARISON_BACKSTORY = """You are an expert automotive analyst with access to advanced AI tools through 
+the Model Context Protocol (MCP). You can leverage OpenAI's most advanced models to provide 
+detailed, accurate, and insightful vehicle comparisons specifically tailored for the Sri Lankan market.
+
+Your expertise includes:
+- Deep technical knowledge of vehicles popular in Sri Lanka
+- Understanding of local market conditions and pricing
+- Access to real-time AI analysis through MCP OpenAI server
+- Ability to provide structured, actionable insights
+"""
+
+_AD_ANALYZER_ROLE = "MCP Intelligent Ad Analyzer"
+_AD_ANALYZER_GOAL = "Analyze vehicle advertisements with advanced AI to extract insights and identify opportunities"
+_AD_ANALYZER_BACKSTORY = """You are an intelligent advertisement analyzer with access to advanced AI capabilities 
+through MCP OpenAI server. You can understand nuanced language, identify key selling points, 
+spot potential issues, and provide valuable insights for car buyers.
+
+Your capabilities include:
+- Natural language understanding of ad content
+- Market price comparison and reasonableness assessment
+- Identification of negotiation opportunities
+- Risk assessment and red flag detection
+- Structured insight generation
+"""
+
+_SEARCH_OPTIMIZER_ROLE = "MCP Smart Search Optimizer"
+_SEARCH_OPTIMIZER_GOAL = "Generate optimized search queries for finding vehicle advertisements using AI insights"
+_SEARCH_OPTIMIZER_BACKSTORY = """You are a smart search optimization specialist with access to advanced AI through 
+MCP OpenAI server. You understand how people search for cars in Sri Lanka and can generate 
+highly effective search queries that maximize the chances of finding relevant advertisements.
+
+Your expertise includes:
+- Understanding Sri Lankan vehicle naming conventions
+- Knowledge of popular model variations and trim levels
+- Search engine optimization for local websites
+- Query generation that accounts for common misspellings and variations
+"""
+
+_ENHANCED_COMPARISON_CONFIG = MappingProxyType({
+    "role": _ENHANCED_COMPARISON_ROLE,
+    "goal": _ENHANCED_COMPARISON_GOAL,
+    "backstory": _ENHANCED_COMPARISON_BACKSTORY,
+    "verbose": settings.VERBOSE,
+    "allow_delegation": False,
+    "tools": [],  # MCP tools will be called programmatically
+    "max_iter": 3
+})
+
+_AD_ANALYZER_CONFIG = MappingProxyType({
+    "role": _AD_ANALYZER_ROLE,
+    "goal": _AD_ANALYZER_GOAL,
+    "backstory": _AD_ANALYZER_BACKSTORY,
+    "verbose": settings.VERBOSE,
+    "allow_delegation": False,
+    "tools": [],  # MCP tools will be called programmatically
+    "max_iter": 2
+})
+
+_SEARCH_OPTIMIZER_CONFIG = MappingProxyType({
+    "role": _SEARCH_OPTIMIZER_ROLE,
+    "goal": _SEARCH_OPTIMIZER_GOAL,
+    "backstory": _SEARCH_OPTIMIZER_BACKSTORY,
+    "verbose": settings.VERBOSE,
+    "allow_delegation": False,
+    "tools": [],  # MCP tools will be called programmatically
+    "max_iter": 2
+})
+
 class MCPEnhancedAgent:
     """
     Enhanced agent that uses MCP OpenAI server for advanced analysis
@@ -16,90 +90,47 @@ class MCPEnhancedAgent:
     
     def __init__(self):
         self.logger = logger
-        self.mcp_tool = create_mcp_openai_tool()
+    
+    @cached_property
+    def mcp_tool(self):
+        """
+        MCP OpenAI tool, created on first use since the agents below don't attach it
+        """
+        from app.tools.mcp_openai_tool import create_mcp_openai_tool
+        return create_mcp_openai_tool()
     
     def enhanced_comparison_agent(self) -> Agent:
         """
         Create an enhanced vehicle comparison agent with MCP OpenAI capabilities
         """
-        return Agent(
-            role="MCP Enhanced Vehicle Analyst",
-            goal="Provide comprehensive vehicle analysis using advanced AI capabilities through MCP OpenAI server",
-            backstory="""You are an expert automotive analyst with access to advanced AI tools through 
-            the Model Context Protocol (MCP). You can leverage OpenAI's most advanced models to provide 
-            detailed, accurate, and insightful vehicle comparisons specifically tailored for the Sri Lankan market.
-            
-            Your expertise includes:
-            - Deep technical knowledge of vehicles popular in Sri Lanka
-            - Understanding of local market conditions and pricing
-            - Access to real-time AI analysis through MCP OpenAI server
-            - Ability to provide structured, actionable insights
-            """,
-            verbose=True,
-            allow_delegation=False,
-            tools=[],  # MCP tools will be called programmatically
-            max_iter=3
-        )
+        return Agent(**_ENHANCED_COMPARISON_CONFIG)
     
     def intelligent_ad_analyzer_agent(self) -> Agent:
         """
         Create an intelligent ad analyzer agent with MCP OpenAI capabilities
         """
-        return Agent(
-            role="MCP Intelligent Ad Analyzer",
-            goal="Analyze vehicle advertisements with advanced AI to extract insights and identify opportunities",
-            backstory="""You are an intelligent advertisement analyzer with access to advanced AI capabilities 
-            through MCP OpenAI server. You can understand nuanced language, identify key selling points, 
-            spot potential issues, and provide valuable insights for car buyers.
-            
-            Your capabilities include:
-            - Natural language understanding of ad content
-            - Market price comparison and reasonableness assessment
-            - Identification of negotiation opportunities
-            - Risk assessment and red flag detection
-            - Structured insight generation
-            """,
-            verbose=True,
-            allow_delegation=False,
-            tools=[],  # MCP tools will be called programmatically
-            max_iter=2
-        )
+        return Agent(**_AD_ANALYZER_CONFIG)
     
     def smart_search_optimizer_agent(self) -> Agent:
         """
         Create a smart search optimizer agent with MCP OpenAI capabilities
         """
-        return Agent(
-            role="MCP Smart Search Optimizer",
-            goal="Generate optimized search queries for finding vehicle advertisements using AI insights",
-            backstory="""You are a smart search optimization specialist with access to advanced AI through 
-            MCP OpenAI server. You understand how people search for cars in Sri Lanka and can generate 
-            highly effective search queries that maximize the chances of finding relevant advertisements.
-            
-            Your expertise includes:
-            - Understanding Sri Lankan vehicle naming conventions
-            - Knowledge of popular model variations and trim levels
-            - Search engine optimization for local websites
-            - Query generation that accounts for common misspellings and variations
-            """,
-            verbose=True,
-            allow_delegation=False,
-            tools=[],  # MCP tools will be called programmatically
-            max_iter=2
-        )
+        return Agent(**_SEARCH_OPTIMIZER_CONFIG)
+
+@lru_cache(maxsize=1)
+def _get_mcp_agent() -> MCPEnhancedAgent:
+    """Shared MCPEnhancedAgent used by the factory functions"""
+    return MCPEnhancedAgent()
 
 # Factory functions for easy integration
 def create_enhanced_comparison_agent() -> Agent:
     """Factory function to create enhanced comparison agent"""
-    mcp_agent = MCPEnhancedAgent()
-    return mcp_agent.enhanced_comparison_agent()
+    return _get_mcp_agent().enhanced_comparison_agent()
 
 def create_intelligent_ad_analyzer() -> Agent:
     """Factory function to create intelligent ad analyzer agent"""
-    mcp_agent = MCPEnhancedAgent()
-    return mcp_agent.intelligent_ad_analyzer_agent()
+    return _get_mcp_agent().intelligent_ad_analyzer_agent()
 
 def create_smart_search_optimizer() -> Agent:
     """Factory function to create smart search optimizer agent"""
-    mcp_agent = MCPEnhancedAgent()
-    return mcp_agent.smart_search_optimizer_agent()
+    return _get_mcp_agent().smart_search_optimizer_agent()
@@ -14,10 +14,29 @@ class Settings:
     # Gemini Configuration (primary)
     GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
     GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-1.5-flash")  # Free tier model
+    GEMINI_UTILITY_MODEL = os.getenv("GEMINI_UTILITY_MODEL", "gemini-1.5-flash-8b")  # Cheaper model for ad finding/extraction
+    GEMINI_VERIFY_CONNECTION = os.getenv("GEMINI_VERIFY_CONNECTION", "true").lower() == "true"  # One test prompt per process
+    GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "8"))  # Crew runs in flight per process; tune to the key's RPM/TPM quota
+    GEMINI_MAX_RPM = int(os.getenv("GEMINI_MAX_RPM", "0")) or None  # Per-crew CrewAI request cap; unset means no throttling
+    COMPARISON_REDUNDANCY = int(os.getenv("COMPARISON_REDUNDANCY", "1"))  # Comparison crews raced per run; >1 multiplies token spend
+
+    # Ad Page Scraping (requests in flight per batch of ad pages; keep it low to stay polite to the sites)
+    AD_SCRAPER_MAX_CONCURRENCY = int(os.getenv("AD_SCRAPER_MAX_CONCURRENCY", "3"))
     
     # Mock Mode Configuration (for testing without API calls)
     USE_MOCK_CREW = os.getenv("USE_MOCK_CREW", "false").lower() == "true"
 
+    # Result Cache Configuration (seconds a completed analysis is reused; 0 disables)
+    RESULT_CACHE_TTL_SECONDS = int(os.getenv("RESULT_CACHE_TTL_SECONDS", "3600"))
+    RESULT_CACHE_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "256"))  # Per process; least recently used pairs are evicted first
+
+    # Stored Comparison Reuse (max age in seconds of a stored report reused for the same pair; 0 never expires)
+    COMPARISON_REPORT_TTL_SECONDS = int(os.getenv("COMPARISON_REPORT_TTL_SECONDS", "604800"))
+
+    # Debug Configuration (verbose agent/crew output is for local debugging only)
+    DEBUG = os.getenv("DEBUG", "false").lower() == "true"
+    VERBOSE = DEBUG
+
     # Tool Configuration
     SERPER_API_KEY = os.getenv("SERPER_API_KEY")
 
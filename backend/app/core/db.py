@@ -1,11 +1,79 @@
 # app/core/db.py
+from contextlib import contextmanager
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 
 SQLALCHEMY_DATABASE_URL = "sqlite:///./ads.db"
 
+# SQLite serializes writers on the database file, so a larger pool would only
+# queue more connections on its lock; the default pool is kept
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
 )
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-Base = declarative_base()
\ No newline at end of file
+Base = declarative_base()
+
+
+@contextmanager
+def session_scope():
+    """
+    Yield a session for one unit of work: commit on success, roll back on error,
+    and always return the connection to the pool.
+    """
+    db = SessionLocal()
+    try:
+        yield db
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def _register_models():
+    """Import every model so its table is registered with Base."""
+    from app.models.ad import Ad  # noqa: F401
+    from app.models.comparison import VehicleComparison  # noqa: F401
+
+
+def ensure_columns():
+    """
+    Add any column declared on the models that an existing table lacks.
+    create_all never alters existing tables, so columns declared later never
+    reach a database created earlier. Added columns start out NULL on existing
+    rows. Idempotent: existing columns are skipped.
+    """
+    from sqlalchemy import inspect, text
+    _register_models()
+
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue  # create_all builds the whole table
+            existing_columns = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing_columns:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+
+
+def ensure_indexes():
+    """
+    Create any index declared on the models that an existing database lacks.
+    create_all only adds indexes together with new tables, so indexes declared
+    later never reach a database created earlier (such as the shipped ads.db).
+    Idempotent: existing indexes are skipped.
+    """
+    from sqlalchemy import inspect
+    _register_models()
+
+    existing_tables = set(inspect(engine).get_table_names())
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue  # create_all builds its indexes along with the table
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
@@ -1,5 +1,7 @@
 # app/crud/ad_crud.py
+from sqlalchemy import Integer, cast, func
 from sqlalchemy.orm import Session
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from app.models.ad import Ad
 from typing import Optional
 
@@ -19,6 +21,29 @@ def create_ad(db: Session, ad_data: dict, analysis_session_id: str = None, vehic
     db.refresh(db_ad)
     return db_ad
 
+def create_ads(db: Session, ads_data: list, commit: bool = True) -> list:
+    """
+    Insert many ads in a single statement and commit once.
+    Ads whose link already exists are skipped.
+    Pass commit=False to leave the commit to the caller's transaction.
+    Returns the links that were actually inserted.
+    """
+    if not ads_data:
+        return []
+
+    # The unique index on link does the deduplication, so there is no need
+    # for a SELECT round-trip before the INSERT
+    stmt = (
+        sqlite_insert(Ad)
+        .values(ads_data)
+        .on_conflict_do_nothing(index_elements=["link"])
+        .returning(Ad.link)
+    )
+    inserted_links = db.scalars(stmt).all()
+    if commit:
+        db.commit()
+    return inserted_links
+
 def get_ads(db: Session, skip: int = 0, limit: int = 100):
     """Get ads with pagination."""
     return db.query(Ad).offset(skip).limit(limit).all()
@@ -31,8 +56,17 @@ def get_ad_by_id(db: Session, ad_id: int) -> Optional[Ad]:
     """Get a specific ad by ID."""
     return db.query(Ad).filter(Ad.id == ad_id).first()
 
-def get_ads_by_filter(db: Session, min_price=None, max_price=None, year=None, location=None, analysis_session_id=None, vehicle_name=None):
-    """Get ads with various filters applied."""
+def _price_as_int():
+    """
+    SQL expression for the numeric price of an ad.
+    Prices are stored as text like "Rs 9,600,000Negotiable"; SQLite's CAST keeps the
+    leading digits once the currency prefix, separators and spaces are removed.
+    """
+    price = func.replace(func.replace(func.replace(Ad.price, "Rs.", ""), "Rs", ""), ",", "")
+    return cast(func.trim(price), Integer)
+
+def get_ads_by_filter(db: Session, min_price=None, max_price=None, year=None, location=None, analysis_session_id=None, vehicle_name=None, skip: int = 0, limit: Optional[int] = None):
+    """Get ads with various filters applied, evaluated in SQL; pass limit to paginate."""
     query = db.query(Ad)
     if year:
         query = query.filter(Ad.year == str(year))
@@ -42,8 +76,15 @@ def get_ads_by_filter(db: Session, min_price=None, max_price=None, year=None, lo
         query = query.filter(Ad.analysis_session_id == analysis_session_id)
     if vehicle_name:
         query = query.filter(Ad.vehicle_name.ilike(f"%{vehicle_name}%"))
-    # For price, you may want to parse and filter as int, but this is a simple example
-    return query.all()
+    if min_price is not None or max_price is not None:
+        price = _price_as_int()
+        # Unparseable prices ("Not Found", "Error") cast to 0 and never match a price filter
+        query = query.filter(price > 0)
+        if min_price is not None:
+            query = query.filter(price >= min_price)
+        if max_price is not None:
+            query = query.filter(price <= max_price)
+    return query.offset(skip).limit(limit).all()
 
 def update_ad(db: Session, ad_id: int, ad_data: dict) -> Optional[Ad]:
     """Update an existing ad."""
@@ -66,15 +107,16 @@ def delete_ad(db: Session, ad_id: int) -> bool:
 
 def get_total_ads_count(db: Session) -> int:
     """Get total count of ads in the database."""
-    return db.query(Ad).count()
+    # A direct COUNT instead of Query.count(), which wraps the whole SELECT in a subquery
+    return db.query(func.count(Ad.id)).scalar()
 
-def get_ads_by_session_id(db: Session, analysis_session_id: str):
-    """Get all ads for a specific analysis session."""
-    return db.query(Ad).filter(Ad.analysis_session_id == analysis_session_id).all()
+def get_ads_by_session_id(db: Session, analysis_session_id: str, skip: int = 0, limit: Optional[int] = None):
+    """Get all ads for a specific analysis session; pass limit to paginate."""
+    return db.query(Ad).filter(Ad.analysis_session_id == analysis_session_id).offset(skip).limit(limit).all()
 
-def get_ads_by_vehicle_and_session(db: Session, vehicle_name: str, analysis_session_id: str):
-    """Get ads for a specific vehicle in a specific analysis session."""
+def get_ads_by_vehicle_and_session(db: Session, vehicle_name: str, analysis_session_id: str, skip: int = 0, limit: Optional[int] = None):
+    """Get ads for a specific vehicle in a specific analysis session; pass limit to paginate."""
     return db.query(Ad).filter(
         Ad.vehicle_name.ilike(f"%{vehicle_name}%"),
         Ad.analysis_session_id == analysis_session_id
-    ).all()
+    ).offset(skip).limit(limit).all()
@@ -1,12 +1,14 @@
 # app/crud/comparison_crud.py
+from sqlalchemy import func, update
 from sqlalchemy.orm import Session
 from app.models.comparison import VehicleComparison
+from app.utils.vehicle_names import comparison_pair_key
 from typing import Optional
-import json
+import orjson
 
 def create_comparison(db: Session, vehicle1: str, vehicle2: str, comparison_report: str, metadata: dict = None):
     """Create a new vehicle comparison report in the database."""
-    metadata_json = json.dumps(metadata) if metadata else None
+    metadata_json = orjson.dumps(metadata).decode() if metadata else None
     
     from uuid import uuid4
 
@@ -15,6 +17,7 @@ def create_comparison(db: Session, vehicle1: str, vehicle2: str, comparison_repo
     db_comparison = VehicleComparison(
         vehicle1=vehicle1,
         vehicle2=vehicle2,
+        pair_key=comparison_pair_key(vehicle1, vehicle2),
         comparison_report=comparison_report,
         metadata_info=metadata_json,
         analysis_session_id=session_id
@@ -25,10 +28,10 @@ def create_comparison(db: Session, vehicle1: str, vehicle2: str, comparison_repo
     return db_comparison
 
 def get_comparison_by_vehicles(db: Session, vehicle1: str, vehicle2: str) -> Optional[VehicleComparison]:
-    """Get the most recent comparison for two specific vehicles."""
+    """Get the most recent comparison for two vehicles, in either order and any spelling."""
+    # One descent of the (pair_key, created_at) index
     return db.query(VehicleComparison).filter(
-        ((VehicleComparison.vehicle1 == vehicle1) & (VehicleComparison.vehicle2 == vehicle2)) |
-        ((VehicleComparison.vehicle1 == vehicle2) & (VehicleComparison.vehicle2 == vehicle1))
+        VehicleComparison.pair_key == comparison_pair_key(vehicle1, vehicle2)
     ).order_by(VehicleComparison.created_at.desc()).first()
 
 def get_comparisons(db: Session, skip: int = 0, limit: int = 100):
@@ -45,11 +48,21 @@ def update_comparison(db: Session, comparison_id: int, comparison_report: str, m
     if db_comparison:
         db_comparison.comparison_report = comparison_report
         if metadata:
-            db_comparison.metadata_info = json.dumps(metadata)
+            db_comparison.metadata_info = orjson.dumps(metadata).decode()
         db.commit()
         db.refresh(db_comparison)
     return db_comparison
 
+def update_comparison_metadata(db: Session, comparison_id: int, metadata: dict, commit: bool = True) -> bool:
+    """Replace a comparison's metadata without loading the row.
+    Pass commit=False to leave the commit to the caller's transaction."""
+    updated = db.query(VehicleComparison).filter(VehicleComparison.id == comparison_id).update(
+        {VehicleComparison.metadata_info: orjson.dumps(metadata).decode()}, synchronize_session=False
+    )
+    if commit:
+        db.commit()
+    return updated > 0
+
 def delete_comparison(db: Session, comparison_id: int) -> bool:
     """Delete a comparison by ID."""
     db_comparison = db.query(VehicleComparison).filter(VehicleComparison.id == comparison_id).first()
@@ -61,24 +74,42 @@ def delete_comparison(db: Session, comparison_id: int) -> bool:
 
 def get_total_comparisons_count(db: Session) -> int:
     """Get total count of comparison reports in the database."""
-    return db.query(VehicleComparison).count()
+    return db.query(func.count(VehicleComparison.id)).scalar()
 
 def get_comparison_by_session_id(db: Session, analysis_session_id: str) -> Optional[VehicleComparison]:
     """Get comparison by analysis session ID."""
     return db.query(VehicleComparison).filter(VehicleComparison.analysis_session_id == analysis_session_id).first()
 
-def create_comparison_with_session_id(db: Session, analysis_session_id: str, vehicle1: str, vehicle2: str, comparison_report: str, metadata: dict = None):
-    """Create a new vehicle comparison with a specific session ID."""
-    metadata_json = json.dumps(metadata) if metadata else None
+def create_comparison_with_session_id(db: Session, analysis_session_id: str, vehicle1: str, vehicle2: str, comparison_report: str, metadata: dict = None, commit: bool = True):
+    """Create a new vehicle comparison with a specific session ID.
+    Pass commit=False to leave the commit to the caller's transaction."""
+    metadata_json = orjson.dumps(metadata).decode() if metadata else None
     
     db_comparison = VehicleComparison(
         analysis_session_id=analysis_session_id,
         vehicle1=vehicle1,
         vehicle2=vehicle2,
+        pair_key=comparison_pair_key(vehicle1, vehicle2),
         comparison_report=comparison_report,
         metadata_info=metadata_json
     )
     db.add(db_comparison)
+    if not commit:
+        db.flush()
+        return db_comparison
     db.commit()
     db.refresh(db_comparison)
     return db_comparison
+
+def backfill_pair_keys(db: Session) -> int:
+    """Fill in pair_key for comparisons stored before the column existed.
+    Returns the number of rows updated; the commit is left to the caller."""
+    rows = db.query(VehicleComparison.id, VehicleComparison.vehicle1, VehicleComparison.vehicle2).filter(
+        VehicleComparison.pair_key.is_(None)
+    ).all()
+    if rows:
+        # Bulk UPDATE by primary key, one executemany
+        db.execute(update(VehicleComparison), [
+            {"id": row.id, "pair_key": comparison_pair_key(row.vehicle1, row.vehicle2)} for row in rows
+        ])
+    return len(rows)
@@ -1,14 +1,159 @@
 # app/gemini_crew.py
-from crewai import Crew, Process
-from langchain_google_genai import ChatGoogleGenerativeAI
-from app.agents.comparison_agent import VehicleComparisonAgent
-from app.agents.ad_finder_agent import SriLankanAdFinderAgent
-from app.agents.details_extractor_agent import AdDetailsExtractorAgent
-from app.tasks import VehicleAnalysisTasks
+# CrewAI, the agents/tasks and the scraping tools are imported where they are used,
+# so importing this module (as main.py does for every endpoint) stays cheap
+from app.schemas.vehicle_schemas import ExtractedAd
 from app.core.config import settings
+from app.utils.vehicle_names import canonicalize_vehicle
+import asyncio
+import copy
+import hashlib
 import os
-import json
+import orjson
+import re
 import structlog
+import weakref
+from uuid import uuid4
+from cachetools import TTLCache
+from pydantic import TypeAdapter, ValidationError
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache, partial
+from urllib.parse import urlsplit
+
+# Compiled once; the ad normalizers and the report cleaner run on every analysis
+_PRICE_NOISE_RE = re.compile(r'Rs\.|LKR|,')
+_MILEAGE_NOISE_RE = re.compile(r'km|,')
+_YEAR_RE = re.compile(r'\b(?:19|20)\d{2}\b')
+# Numbers already in the normalizers' "1,234,567" output format
+_GROUPED_NUMBER_RE = re.compile(r'(?:[1-9]\d{0,2}(?:,\d{3})*|0)')
+# One pass over the report: blank-line runs, space runs, and characters unsafe to store
+_REPORT_CLEANUP_RE = re.compile(r'(\n\s*\n)|( +)|([^\w\s\n.,;:!?()\[\]{}"\'-])')
+_REPORT_CLEANUP_REPLACEMENTS = (None, '\n\n', ' ', '')  # Indexed by the matched group
+
+# Built once; validates a whole extractor output (raw JSON or parsed list) in one call
+_AD_LIST_ADAPTER = TypeAdapter(list[ExtractedAd])
+
+# Shared by every crew kickoff on a loop so concurrent requests stay under the
+# Gemini rate limits; each waiting kickoff starts as soon as any other finishes.
+# A semaphore belongs to one event loop, so it is created per loop on first use
+_LLM_SEMAPHORES = weakref.WeakKeyDictionary()
+
+# Placeholder reports returned when the comparison failed; never stored, cached or reused
+_FAILED_COMPARISON_REPORTS = frozenset({
+    "No comparison report available.",
+    "Comparison report extraction failed.",
+    "Error generating comparison report."
+})
+
+# Completed analyses keyed by _result_cache_key; bounded, least recently used entries go first
+_RESULT_CACHE = TTLCache(maxsize=settings.RESULT_CACHE_MAX_ENTRIES, ttl=settings.RESULT_CACHE_TTL_SECONDS)
+
+def _result_cache_key(vehicle1: str, vehicle2: str) -> str:
+    """Deterministic, order-insensitive cache key for a vehicle pair on the configured models."""
+    payload = orjson.dumps({
+        "vehicles": sorted([canonicalize_vehicle(vehicle1), canonicalize_vehicle(vehicle2)]),
+        "model": settings.GEMINI_MODEL,
+        "utility_model": settings.GEMINI_UTILITY_MODEL
+    }, option=orjson.OPT_SORT_KEYS)
+    return hashlib.sha256(payload).hexdigest()
+
+def _llm_semaphore() -> asyncio.Semaphore:
+    """The LLM semaphore for the running event loop, created on first use."""
+    loop = asyncio.get_running_loop()
+    semaphore = _LLM_SEMAPHORES.get(loop)
+    if semaphore is None:
+        semaphore = _LLM_SEMAPHORES[loop] = asyncio.Semaphore(settings.GEMINI_MAX_CONCURRENCY)
+    return semaphore
+
+async def _kickoff_with_llm_slot(crew):
+    """
+    Run crew.kickoff_async() under the loop's LLM semaphore.
+    Cancelling the caller cannot stop the kickoff's worker thread, so the slot is
+    released when the kickoff itself finishes rather than when the caller stops waiting.
+    """
+    semaphore = _llm_semaphore()
+    await semaphore.acquire()
+    kickoff = asyncio.ensure_future(crew.kickoff_async())
+    kickoff.add_done_callback(partial(_release_llm_slot, semaphore))
+    return await asyncio.shield(kickoff)
+
+def _release_llm_slot(semaphore, kickoff):
+    semaphore.release()
+    if not kickoff.cancelled():
+        kickoff.exception()  # Retrieved here, so abandoned failures are not reported as unhandled
+
+def _canonicalize_ad_url(url: str) -> str:
+    """Lowercase the URL and drop query, fragment and trailing slash so cross-listed ads compare equal."""
+    parts = urlsplit(url.strip().lower())
+    return f"{parts.netloc}{parts.path.rstrip('/')}"
+
+@lru_cache(maxsize=None)
+def _configure_gemini_environment():
+    """
+    Validate the Gemini API key and point CrewAI/LiteLLM at Google AI Studio.
+    Runs once per process; a failed validation raises and is retried on the next call.
+    Returns the masked key for logging.
+    """
+    # Validate Gemini API key with detailed error information
+    if not settings.GEMINI_API_KEY:
+        raise ValueError("GEMINI_API_KEY is not set. Please add GEMINI_API_KEY to your .env file. Get your key from: https://makersuite.google.com/app/apikey")
+    
+    if settings.GEMINI_API_KEY == "your_gemini_api_key_here":
+        raise ValueError("GEMINI_API_KEY is set to placeholder value. Please replace with your actual Gemini API key from: https://makersuite.google.com/app/apikey")
+    
+    if len(settings.GEMINI_API_KEY) < 20:  # Basic sanity check
+        raise ValueError("GEMINI_API_KEY appears to be invalid (too short). Please check your API key from: https://makersuite.google.com/app/apikey")
+    
+    # Set environment variables for CrewAI to use Google AI Studio directly (not Vertex AI)
+    os.environ["GOOGLE_API_KEY"] = settings.GEMINI_API_KEY
+    
+    # Clear OpenAI environment variables to prevent conflicts
+    os.environ.pop("OPENAI_API_KEY", None)
+    os.environ.pop("OPENAI_MODEL_NAME", None)
+    os.environ.pop("OPENAI_API_BASE", None)
+    
+    # Explicitly prevent Vertex AI usage by clearing ALL Google Cloud credentials
+    os.environ.pop("GOOGLE_APPLICATION_CREDENTIALS", None)
+    os.environ.pop("GOOGLE_CLOUD_PROJECT", None)
+    os.environ.pop("GCLOUD_PROJECT", None)
+    os.environ.pop("GOOGLE_CLOUD_QUOTA_PROJECT", None)
+    
+    # Force empty string to prevent any file-based auth
+    os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = ""
+    
+    # Set LiteLLM to use Google AI Studio API explicitly
+    os.environ["LITELLM_LOG"] = "INFO"  
+    
+    # Force CrewAI to use the Google AI Studio provider format
+    # Use the correct LiteLLM format for Google AI Studio (not Vertex AI)
+    # Format: gemini/model-name for Google AI Studio
+    model_name = f"gemini/{settings.GEMINI_MODEL}"
+    os.environ["OPENAI_MODEL_NAME"] = model_name
+    
+    # Also try setting it as the default model
+    os.environ["LITELLM_MODEL"] = model_name
+    
+    # Additional environment variables to force Google AI Studio
+    os.environ["GEMINI_API_KEY"] = settings.GEMINI_API_KEY  # Explicit Gemini key
+    os.environ["GOOGLE_AI_STUDIO_API_KEY"] = settings.GEMINI_API_KEY  # Alternative name
+    
+    # Mask the API key for logging
+    key = settings.GEMINI_API_KEY
+    return f"{key[:8]}...{key[-4:]}" if len(key) > 12 else "[CONFIGURED]"
+
+@lru_cache(maxsize=1)
+def _verify_gemini_connection(model: str, api_key: str) -> int:
+    """
+    Send one test prompt to Google AI Studio to make sure the API key works.
+    Runs once per process; a failed probe raises and is retried on the next call.
+    Returns the length of the test response.
+    """
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    test_llm = ChatGoogleGenerativeAI(model=model, google_api_key=api_key)
+    test_result = test_llm.invoke("Test")
+    return len(test_result.content) if hasattr(test_result, 'content') else 0
+
+class SameVehicleError(ValueError):
+    """Raised when vehicle1 and vehicle2 name the same vehicle."""
 
 class GeminiVehicleAnalysisCrew:
     """
@@ -16,79 +161,39 @@ class GeminiVehicleAnalysisCrew:
     Uses the free Gemini 1.5 Flash model with generous quotas
     """
     
+    # One instance per request, so skip the per-instance __dict__
+    __slots__ = ("logger", "vehicle1", "vehicle2", "_vehicle1_lower", "_vehicle2_lower")
+    
     def __init__(self, vehicle1: str, vehicle2: str):
         self.logger = structlog.get_logger()
         self.vehicle1 = vehicle1
         self.vehicle2 = vehicle2
+        # Lowercase forms the report cleaner recases back to the requested names
+        self._vehicle1_lower = vehicle1.lower()
+        self._vehicle2_lower = vehicle2.lower()
         
-        # Validate Gemini API key with detailed error information
-        if not settings.GEMINI_API_KEY:
-            raise ValueError("GEMINI_API_KEY is not set. Please add GEMINI_API_KEY to your .env file. Get your key from: https://makersuite.google.com/app/apikey")
-        
-        if settings.GEMINI_API_KEY == "your_gemini_api_key_here":
-            raise ValueError("GEMINI_API_KEY is set to placeholder value. Please replace with your actual Gemini API key from: https://makersuite.google.com/app/apikey")
-        
-        if len(settings.GEMINI_API_KEY) < 20:  # Basic sanity check
-            raise ValueError("GEMINI_API_KEY appears to be invalid (too short). Please check your API key from: https://makersuite.google.com/app/apikey")
-        
-        # Set environment variables for CrewAI to use Google AI Studio directly (not Vertex AI)
-        os.environ["GOOGLE_API_KEY"] = settings.GEMINI_API_KEY
-        
-        # Clear OpenAI environment variables to prevent conflicts
-        os.environ.pop("OPENAI_API_KEY", None)
-        os.environ.pop("OPENAI_MODEL_NAME", None)
-        os.environ.pop("OPENAI_API_BASE", None)
+        if canonicalize_vehicle(vehicle1) == canonicalize_vehicle(vehicle2):
+            raise SameVehicleError(f"vehicle1 and vehicle2 refer to the same vehicle ('{vehicle1}'); please choose two different vehicles.")
         
-        # Explicitly prevent Vertex AI usage by clearing ALL Google Cloud credentials
-        os.environ.pop("GOOGLE_APPLICATION_CREDENTIALS", None)
-        os.environ.pop("GOOGLE_CLOUD_PROJECT", None)
-        os.environ.pop("GCLOUD_PROJECT", None)
-        os.environ.pop("GOOGLE_CLOUD_QUOTA_PROJECT", None)
+        # Validates the key and configures the environment once per process
+        api_key_masked = _configure_gemini_environment()
         
-        # Force empty string to prevent any file-based auth
-        os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = ""
+        # CrewAI reaches Gemini through LiteLLM using the environment configured above;
+        # agents name their model explicitly, so no LLM object is built here
         
-        # Set LiteLLM to use Google AI Studio API explicitly
-        os.environ["LITELLM_LOG"] = "INFO"  
-        
-        # Force CrewAI to use the Google AI Studio provider format
-        # Use the correct LiteLLM format for Google AI Studio (not Vertex AI)
-        # Format: gemini/model-name for Google AI Studio
-        model_name = f"gemini/{settings.GEMINI_MODEL}"
-        os.environ["OPENAI_MODEL_NAME"] = model_name
-        
-        # Also try setting it as the default model
-        os.environ["LITELLM_MODEL"] = model_name
-        
-        # Additional environment variables to force Google AI Studio
-        os.environ["GEMINI_API_KEY"] = settings.GEMINI_API_KEY  # Explicit Gemini key
-        os.environ["GOOGLE_AI_STUDIO_API_KEY"] = settings.GEMINI_API_KEY  # Alternative name
-        
-        # Use environment variables approach - explicit LLM still routes through LiteLLM with issues
-        # The direct LangChain integration works fine, but CrewAI needs specific model naming
-        self.llm = None  # Let CrewAI handle LLM via environment variables for now
-        
-        # Test direct connection to ensure API key works
-        try:
-            from langchain_google_genai import ChatGoogleGenerativeAI
-            test_llm = ChatGoogleGenerativeAI(
-                model=settings.GEMINI_MODEL,
-                google_api_key=settings.GEMINI_API_KEY,
-            )
-            # Quick test to verify connectivity
-            test_result = test_llm.invoke("Test")
-            self.logger.info("Google AI Studio connection verified", 
-                           model=settings.GEMINI_MODEL,
-                           response_length=len(test_result.content) if hasattr(test_result, 'content') else 0)
-        except Exception as e:
-            self.logger.error("Google AI Studio connection test failed", 
-                            error=str(e), model=settings.GEMINI_MODEL)
-            raise ValueError(f"Cannot connect to Google AI Studio: {str(e)}")
-        
-        self.logger.info("Environment configured for Google AI Studio", model=settings.GEMINI_MODEL)
+        # Test direct connection to ensure API key works (once per process, not per request)
+        if settings.GEMINI_VERIFY_CONNECTION:
+            try:
+                response_length = _verify_gemini_connection(settings.GEMINI_MODEL, settings.GEMINI_API_KEY)
+                self.logger.debug("Google AI Studio connection verified", 
+                               model=settings.GEMINI_MODEL,
+                               response_length=response_length)
+            except Exception as e:
+                self.logger.error("Google AI Studio connection test failed", 
+                                error=str(e), model=settings.GEMINI_MODEL)
+                raise ValueError(f"Cannot connect to Google AI Studio: {str(e)}")
         
-        # Log configuration (mask API key)
-        api_key_masked = f"{settings.GEMINI_API_KEY[:8]}...{settings.GEMINI_API_KEY[-4:]}" if len(settings.GEMINI_API_KEY) > 12 else "[CONFIGURED]"
+        self.logger.debug("Environment configured for Google AI Studio", model=settings.GEMINI_MODEL)
         
         self.logger.info("GeminiVehicleAnalysisCrew initialized", 
                         vehicle1=vehicle1, 
@@ -97,18 +202,6 @@ class GeminiVehicleAnalysisCrew:
                         model=settings.GEMINI_MODEL,
                         provider="google-gemini")
 
-    def _clean_and_store_comparison_report(self, raw_report):
-        """
-        Clean and store the comparison report in the database.
-        """
-        clean_report = self._clean_comparison_report(raw_report)
-        self._store_comparison_in_database(
-            self.vehicle1,
-            self.vehicle2,
-            clean_report,
-            {}
-        )
-
     def _clean_comparison_report(self, report):
         """
         Clean and normalize the comparison report before storing in database.
@@ -124,57 +217,65 @@ class GeminiVehicleAnalysisCrew:
             lines = clean_report.split('\n')
             clean_report = '\n'.join(lines[1:-1]) if len(lines) > 2 else clean_report
         
-        # Normalize excessive whitespace
-        import re
-        clean_report = re.sub(r'\n\s*\n', '\n\n', clean_report)  # Normalize paragraph breaks
-        clean_report = re.sub(r' +', ' ', clean_report)  # Remove extra spaces
+        # Ensure proper vehicle name formatting; done before the cleanup scan,
+        # which strips characters such as "/" that the lowercased names may contain
+        clean_report = clean_report.replace(self._vehicle1_lower, self.vehicle1)
+        clean_report = clean_report.replace(self._vehicle2_lower, self.vehicle2)
         
-        # Ensure proper vehicle name formatting
-        clean_report = clean_report.replace(self.vehicle1.lower(), self.vehicle1)
-        clean_report = clean_report.replace(self.vehicle2.lower(), self.vehicle2)
-        
-        # Remove any emojis or special characters that might cause DB issues
-        clean_report = re.sub(r'[^\w\s\n.,;:!?()\[\]{}"\'-]', '', clean_report)
+        # Normalize paragraph breaks and extra spaces, and remove any emojis or
+        # special characters that might cause DB issues, in a single scan
+        clean_report = _REPORT_CLEANUP_RE.sub(
+            lambda match: _REPORT_CLEANUP_REPLACEMENTS[match.lastindex], clean_report
+        )
         
-        self.logger.info("Comparison report cleaned", 
+        self.logger.debug("Comparison report cleaned", 
                         original_length=len(report), 
                         cleaned_length=len(clean_report))
         
         return clean_report.strip()
 
-    def run(self):
+    async def run(self):
+        # Every log line in this run (including worker threads and the gathered
+        # crews, which copy the context) carries the vehicle pair and a run ID
+        structlog.contextvars.bind_contextvars(
+            vehicle1=self.vehicle1,
+            vehicle2=self.vehicle2,
+            analysis_run_id=uuid4().hex
+        )
         try:
-            self.logger.info("Starting Gemini-powered crew execution", 
-                           vehicles=[self.vehicle1, self.vehicle2],
+            # Repeated queries for the same pair skip every LLM call and all scraping
+            cache_key = _result_cache_key(self.vehicle1, self.vehicle2)
+            cached_output = self._get_cached_result(cache_key)
+            if cached_output is not None:
+                self.logger.debug("Returning cached analysis result")
+                return cached_output
+            
+            self.logger.debug("Starting Gemini-powered crew execution", 
                            model=settings.GEMINI_MODEL)
             
-            # 1. Create Gemini-optimized agents
-            self.logger.info("Creating Gemini-optimized AI agents")
-            agents = self._create_gemini_agents()
-            self.logger.info("Gemini agents created successfully", agent_count=len(agents))
-
-            # 2. Execute comparison task first and store immediately
-            self.logger.info("Executing comparison task first")
-            comparison_report = self._execute_comparison_task_and_store(agents)
-            
-            # 3. Create remaining tasks (ad finding and extraction)
-            self.logger.info("Creating ad finding and extraction tasks")
-            tasks = self._create_ad_tasks(agents)
-            self.logger.info("Ad tasks created successfully", task_count=len(tasks))
-
-            # 4. Assemble crew for ad processing
-            self.logger.info("Assembling crew for ad processing")
-            crew = self._create_gemini_crew(agents, tasks)
-            self.logger.info("Ad processing crew assembled successfully")
-
-            # 5. Execute ad finding and extraction
-            self.logger.info("Executing ad finding and extraction workflow")
-            result = crew.kickoff() if tasks else None
-            self.logger.info("Ad processing crew execution completed")
+            # 1. Run the comparison crew and both vehicles' ad finding + extraction
+            #    crews concurrently; none of them depends on another's output.
+            #    Each crew builds its own agents, and only if it actually needs an LLM.
+            #    The comparison is stored as soon as it finishes, while ads are still running
+            analysis_session_id = str(uuid4())
+            self.logger.debug("Executing comparison and ad processing crews concurrently")
+            (comparison_report, comparison_id, comparison_metadata), vehicle1_ads_output, vehicle2_ads_output = await asyncio.gather(
+                self._execute_comparison_and_store(analysis_session_id),
+                self._run_ad_pipeline(self.vehicle1),
+                self._run_ad_pipeline(self.vehicle2)
+            )
+            ad_outputs = {
+                'vehicle1_ads': vehicle1_ads_output,
+                'vehicle2_ads': vehicle2_ads_output
+            }
+            self.logger.debug("Comparison and ad processing crews completed")
 
-            # 6. Process ad results and combine with stored comparison
-            self.logger.info("Processing ad results")
-            final_output = self._parse_crew_result_with_comparison(result, comparison_report)
+            # 2. Process and store ad results and combine them with the comparison
+            self.logger.debug("Processing ad results")
+            final_output = await asyncio.to_thread(
+                self._parse_crew_result_with_comparison,
+                ad_outputs, comparison_report, analysis_session_id, comparison_id, comparison_metadata
+            )
             
             self.logger.info("Gemini analysis completed successfully", 
                            comparison_generated=bool(final_output.get('comparison_report')),
@@ -182,77 +283,90 @@ class GeminiVehicleAnalysisCrew:
                            vehicle2_ads_found=len(final_output.get('vehicle2_ads', [])),
                            llm_provider="google-gemini")
             
+            self._cache_result(cache_key, final_output)
             return final_output
             
         except Exception as e:
             self.logger.error("Gemini crew execution failed", 
                             error=str(e),
                             error_type=type(e).__name__,
-                            vehicles=[self.vehicle1, self.vehicle2],
                             model=settings.GEMINI_MODEL)
             raise
+        finally:
+            structlog.contextvars.unbind_contextvars("vehicle1", "vehicle2", "analysis_run_id")
+    
+    def _get_cached_result(self, cache_key):
+        """
+        Return a copy of the cached analysis for cache_key if it is still within the TTL.
+        """
+        output = _RESULT_CACHE.get(cache_key)
+        if output is None:
+            return None
+        output = copy.deepcopy(output)
+        
+        # The key ignores order, so a hit may come from the swapped pair
+        if canonicalize_vehicle(output.get('vehicle1_name', '')) != canonicalize_vehicle(self.vehicle1):
+            output['vehicle1_ads'], output['vehicle2_ads'] = output.get('vehicle2_ads', []), output.get('vehicle1_ads', [])
+        output['vehicle1_name'] = self.vehicle1
+        output['vehicle2_name'] = self.vehicle2
+        return output
     
-    def _create_gemini_agents(self):
-        """Create agents optimized for Gemini with explicit LLM"""
-        # Pass explicit LLM if available, otherwise let CrewAI handle it
-        if self.llm:
-            self.logger.info("Using explicit Gemini LLM for agents")
-            comparison_agent = VehicleComparisonAgent().expert_reviewer(llm=self.llm)
-            ad_finder_agent = SriLankanAdFinderAgent().ad_finder(llm=self.llm)
-            details_extractor_agent = AdDetailsExtractorAgent().details_extractor(llm=self.llm)
-        else:
-            self.logger.info("Using environment-based LLM for agents")
-            comparison_agent = VehicleComparisonAgent().expert_reviewer()
-            ad_finder_agent = SriLankanAdFinderAgent().ad_finder()
-            details_extractor_agent = AdDetailsExtractorAgent().details_extractor()
-        
-        return {
-            'comparison': comparison_agent,
-            'ad_finder': ad_finder_agent,  
-            'details_extractor': details_extractor_agent
+    def _cache_result(self, cache_key, output):
+        """
+        Cache a successful analysis; failed or partial results are never cached.
+        """
+        if settings.RESULT_CACHE_TTL_SECONDS <= 0:
+            return
+        if not output.get('metadata', {}).get('parsing_success'):
+            return
+        if output.get('comparison_report') in _FAILED_COMPARISON_REPORTS:
+            return
+        _RESULT_CACHE[cache_key] = copy.deepcopy(output)
+    
+    def _create_gemini_agents(self, roles=('comparison', 'ad_finder', 'details_extractor')):
+        """
+        Build fresh Gemini agents for the given roles.
+        Crews run concurrently, so every crew gets agents of its own.
+        """
+        from app.agents.comparison_agent import VehicleComparisonAgent
+        from app.agents.ad_finder_agent import SriLankanAdFinderAgent
+        from app.agents.details_extractor_agent import AdDetailsExtractorAgent
+        # The comparison is the only reasoning-heavy task; URL triage and
+        # extraction are mechanical and run on the cheaper utility model
+        utility_llm = f"gemini/{settings.GEMINI_UTILITY_MODEL}"
+        builders = {
+            'comparison': lambda: VehicleComparisonAgent().expert_reviewer(),
+            'ad_finder': lambda: SriLankanAdFinderAgent().ad_finder(llm=utility_llm),
+            'details_extractor': lambda: AdDetailsExtractorAgent().details_extractor(llm=utility_llm)
         }
+        self.logger.debug("Creating Gemini agents", roles=roles,
+                       reasoning_model=settings.GEMINI_MODEL,
+                       utility_model=settings.GEMINI_UTILITY_MODEL)
+        return {role: builders[role]() for role in roles}
     
-    def _create_gemini_tasks(self, agents):
-        """Create tasks optimized for Gemini's capabilities"""
-        tasks_manager = VehicleAnalysisTasks()
-        tasks = []
-        
-        # 1. Vehicle comparison (Gemini excels at detailed analysis)
-        comparison_task = tasks_manager.vehicle_comparison_task(
-            agents['comparison'], self.vehicle1, self.vehicle2
-        )
-        tasks.append(comparison_task)
-        self.logger.info("Gemini comparison task created")
-        
-        # 2. Ad finding tasks
-        find_ads_v1 = tasks_manager.find_ads_task(agents['ad_finder'], self.vehicle1)
-        find_ads_v2 = tasks_manager.find_ads_task(agents['ad_finder'], self.vehicle2)
-        tasks.extend([find_ads_v1, find_ads_v2])
-        self.logger.info("Gemini ad finding tasks created")
-        
-        # 3. Details extraction tasks
-        extract_v1 = tasks_manager.extract_details_task(
-            agents['details_extractor'], self.vehicle1, find_ads_v1
-        )
-        extract_v2 = tasks_manager.extract_details_task(
-            agents['details_extractor'], self.vehicle2, find_ads_v2
-        )
-        tasks.extend([extract_v1, extract_v2])
-        self.logger.info("Gemini extraction tasks created")
-        
-        return tasks
+    @staticmethod
+    @lru_cache(maxsize=1)
+    def _tasks_manager():
+        """
+        The task factory is stateless (vehicles are passed per task), so it is
+        built once per process and shared by all runs.
+        """
+        from app.tasks import VehicleAnalysisTasks
+        return VehicleAnalysisTasks()
     
     def _create_gemini_crew(self, agents, tasks):
         """Create crew optimized for Gemini performance"""
+        from crewai import Crew, Process
         agent_list = list(agents.values())
         
         crew = Crew(
             agents=agent_list,
             tasks=tasks,
             process=Process.sequential,
-            verbose=True,
+            verbose=settings.VERBOSE,
             memory=False,  # Disable for better performance
-            cache=True     # Enable cache for Gemini (it's faster)
+            cache=True,    # Enable cache for Gemini (it's faster)
+            max_rpm=settings.GEMINI_MAX_RPM
         )
         
         self.logger.info("Gemini crew configured", 
@@ -263,177 +377,99 @@ class GeminiVehicleAnalysisCrew:
         
         return crew
     
-    def _store_ads_in_database_safe(self, ads_data, analysis_session_id=None) -> list:
+    def _store_ads_in_database_safe(self, ads_data, analysis_session_id=None, comparison_id=None,
+                                    comparison_metadata=None) -> list:
         """
-        Store ads in the database with enhanced transaction management and deduplication.
-        Returns list of successfully stored ads.
+        Store ads in the database with a single bulk insert and deduplication,
+        linked to comparison_id when given.
+        When comparison_metadata is given (the comparison was stored by this run), it is
+        rewritten in the same transaction with the ad counts added.
+        Returns the links of the successfully stored ads.
         """
-        if not ads_data:
+        if not ads_data and comparison_metadata is None:
             return []
             
-        from app.core.db import SessionLocal
-        from app.crud.ad_crud import create_ad, get_existing_ad_by_link
-        from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+        from app.core.db import session_scope
+        from app.crud.ad_crud import create_ads
+        from app.crud.comparison_crud import update_comparison_metadata
+        from sqlalchemy.exc import SQLAlchemyError
         from uuid import uuid4
         
-        stored_ads = []
-        failed_ads = []
-        duplicate_ads = []
-        
         # Generate session ID if not provided
         if not analysis_session_id:
             analysis_session_id = str(uuid4())
         
-        db = SessionLocal()
+        received_count = len(ads_data or [])
+        ads_data = self._dedupe_ads_by_url(ads_data or [])
+        
+        # Ads arrive in the AdDetails format, which is also the API payload, so rows are
+        # shallow copies; untagged ads (legacy callers) get session data filled in
+        rows = []
+        for ad in ads_data:
+            if not isinstance(ad, dict) or not ad.get("link"):
+                self.logger.debug("Skipping invalid ad data", ad_data=ad)
+                continue
+            row = {**ad, "comparison_id": comparison_id}
+            row.setdefault("analysis_session_id", analysis_session_id)
+            row.setdefault("vehicle_name", self.vehicle1)
+            rows.append(row)
+        
+        if not rows and comparison_metadata is None:
+            return []
+        
+        stored_ads = []
         try:
-            for ad in ads_data:
-                # Check for either "URL" (old format) or "url" (new scraper format)
-                ad_url = ad.get("URL") or ad.get("url") if isinstance(ad, dict) else None
-                if not isinstance(ad, dict) or not ad_url:
-                    self.logger.warning("Skipping invalid ad data", ad_data=str(ad)[:100])
-                    continue
-                    
-                ad_data = {
-                    "title": ad.get("ad_title", "Not Found"),
-                    "price": ad.get("price_lkr", "Not Found"),
-                    "location": ad.get("location", "Not Found"),
-                    "mileage": ad.get("mileage_km", "Not Found"),
-                    "year": str(ad.get("year", "Not Found")),
-                    "link": ad_url
-                }
-                
-                # Determine vehicle name based on ad data or context
-                vehicle_name = None
-                if ad.get("vehicle_name"):
-                    vehicle_name = ad.get("vehicle_name")
-                else:
-                    # Try to determine from ad title (check both possible field names)
-                    title_lower = (ad.get("Ad Title") or ad.get("ad_title", "")).lower()
-                    if "aqua" in title_lower or self.vehicle1.lower() in title_lower:
-                        vehicle_name = self.vehicle1
-                    elif "fit" in title_lower or self.vehicle2.lower() in title_lower:
-                        vehicle_name = self.vehicle2
-                    else:
-                        # Default to vehicle1 if we can't determine
-                        vehicle_name = self.vehicle1
-                
-                try:
-                    # Check if ad already exists before attempting to create
-                    existing_ad = get_existing_ad_by_link(db, ad_data["link"])
-                    if existing_ad:
-                        duplicate_ads.append(ad_data["link"])
-                        self.logger.debug("Duplicate ad skipped", link=ad_data["link"])
-                        continue
-                    
-                    # Create new ad WITH session tracking data
-                    created_ad = create_ad(db, ad_data, 
-                                         analysis_session_id=analysis_session_id, 
-                                         vehicle_name=vehicle_name)
-                    stored_ads.append(created_ad)
-                    self.logger.info("Ad stored successfully with session data", 
-                                   title=ad_data["title"], 
-                                   link=ad_data["link"],
-                                   session_id=analysis_session_id,
-                                   vehicle_name=vehicle_name)
-                    
-                except IntegrityError as e:
-                    db.rollback()
-                    duplicate_ads.append(ad_data["link"])
-                    self.logger.debug("Duplicate ad detected during insert", 
-                                    link=ad_data["link"], 
-                                    error=str(e))
-                    
-                except SQLAlchemyError as e:
-                    db.rollback()
-                    failed_ads.append(ad_data["link"])
-                    self.logger.error("Database error storing ad", 
-                                    link=ad_data["link"], 
-                                    error=str(e))
-                    
-                except Exception as e:
-                    db.rollback()
-                    failed_ads.append(ad_data["link"])
-                    self.logger.error("Unexpected error storing ad", 
-                                    link=ad_data["link"], 
-                                    error=str(e))
-            
-            # Final commit for all successful operations
-            db.commit()
+            # The ads and the comparison's ad counts share one commit
+            with session_scope() as db:
+                # One INSERT ... ON CONFLICT DO NOTHING for the whole batch
+                stored_ads = create_ads(db, rows, commit=False)
+                if comparison_metadata is not None and comparison_id is not None:
+                    update_comparison_metadata(db, comparison_id, {
+                        **comparison_metadata,
+                        "total_ads_found": len(ads_data),
+                        "ads_stored": len(stored_ads)
+                    }, commit=False)
             
             # Log summary
             self.logger.info("Database storage completed", 
                            stored_count=len(stored_ads),
-                           duplicate_count=len(duplicate_ads),
-                           failed_count=len(failed_ads),
+                           duplicate_count=len(rows) - len(stored_ads),
+                           skipped_count=len(ads_data) - len(rows),
+                           dedup_dropped=received_count - len(ads_data),
+                           session_id=analysis_session_id,
                            total_processed=len(ads_data))
             
+        except SQLAlchemyError as e:
+            stored_ads = []
+            self.logger.error("Database error during bulk ad storage", 
+                            ad_count=len(rows), 
+                            error=str(e))
+            
         except Exception as e:
-            db.rollback()
+            stored_ads = []
             self.logger.error("Critical database error during ad storage", error=str(e))
             
-        finally:
-            db.close()
-            
         return stored_ads
     
-    def _store_ads_in_database(self, ads_data):
-        """
-        Legacy method - kept for backward compatibility.
-        """
-        return self._store_ads_in_database_safe(ads_data)
-    
-    def _extract_task_outputs(self, result):
-        """
-        Extract outputs from different crew result formats.
-        """
-        outputs = {}
-        
-        try:
-            # Handle CrewOutput object
-            if hasattr(result, 'tasks_output') and result.tasks_output:
-                task_outputs = result.tasks_output
-                self.logger.info(f"Processing {len(task_outputs)} task outputs")
-                
-                for i, task_output in enumerate(task_outputs):
-                    output_text = task_output.raw if hasattr(task_output, 'raw') else str(task_output)
-                    
-                    # Identify task type based on content and order
-                    if i == 0 or "#" in output_text or "comparison" in output_text.lower():
-                        outputs['comparison'] = output_text
-                    elif self._is_ads_json_data(output_text):
-                        # Determine which vehicle these ads belong to
-                        vehicle_key = f"vehicle{len([k for k in outputs.keys() if 'vehicle' in k]) + 1}_ads"
-                        outputs[vehicle_key] = output_text
-                        
-            # Handle legacy formats
-            elif hasattr(result, 'raw'):
-                outputs['comparison'] = result.raw if isinstance(result.raw, str) else str(result.raw)
-            elif isinstance(result, dict):
-                result_values = list(result.values())
-                if len(result_values) > 0:
-                    outputs['comparison'] = result_values[0]
-                if len(result_values) > 2:
-                    outputs['vehicle1_ads'] = result_values[2]
-                if len(result_values) > 4:
-                    outputs['vehicle2_ads'] = result_values[4]
-            elif isinstance(result, str):
-                outputs['comparison'] = result
-                
-        except Exception as e:
-            self.logger.warning(f"Error extracting task outputs: {str(e)}")
-            
-        return outputs
-    
-    def _is_ads_json_data(self, text: str) -> bool:
+    def _dedupe_ads_by_url(self, ads_data, seen=None):
         """
-        Check if text contains JSON ad data.
+        Drop ads without a URL and ads whose canonical URL was already seen.
+        Pass the same seen set across calls to dedupe between vehicles.
         """
-        if not isinstance(text, str):
-            return False
-        
-        text_lower = text.lower()
-        return (('[' in text and ']' in text) and 
-                ('ad title' in text_lower or 'price' in text_lower or 'url' in text_lower))
+        if seen is None:
+            seen = set()
+        unique_ads = []
+        for ad in ads_data:
+            ad_url = ad.get("link") if isinstance(ad, dict) else None
+            if not ad_url:
+                unique_ads.append(ad)  # Left for the caller to report as invalid
+                continue
+            canonical_url = _canonicalize_ad_url(ad_url)
+            if canonical_url in seen:
+                continue
+            seen.add(canonical_url)
+            unique_ads.append(ad)
+        return unique_ads
     
     def _parse_and_validate_ads(self, ads_data) -> list:
         """
@@ -443,6 +479,15 @@ class GeminiVehicleAnalysisCrew:
             return []
         
         try:
+            # Fast path: a clean output is parsed and validated in a single call
+            try:
+                if isinstance(ads_data, list):
+                    return [self._normalize_ad_data(ad) for ad in _AD_LIST_ADAPTER.validate_python(ads_data)]
+                if isinstance(ads_data, str):
+                    return [self._normalize_ad_data(ad) for ad in _AD_LIST_ADAPTER.validate_json(ads_data)]
+            except ValidationError:
+                pass
+            
             # Handle different input formats
             if isinstance(ads_data, list):
                 parsed_ads = ads_data
@@ -452,17 +497,18 @@ class GeminiVehicleAnalysisCrew:
                 self.logger.warning(f"Unexpected ads data type: {type(ads_data)}")
                 return []
             
-            # Validate each ad entry
+            # Validate each ad entry on its own so one bad ad does not drop the rest
             validated_ads = []
             for ad in parsed_ads:
-                if isinstance(ad, dict) and self._validate_ad_data(ad):
-                    # Normalize ad data
-                    normalized_ad = self._normalize_ad_data(ad)
-                    validated_ads.append(normalized_ad)
-                else:
-                    self.logger.warning(f"Invalid ad data structure: {ad}")
+                try:
+                    extracted_ad = ExtractedAd.model_validate(ad)
+                except ValidationError:
+                    self.logger.debug("Invalid ad data structure", ad_data=ad)
+                    continue
+                validated_ads.append(self._normalize_ad_data(extracted_ad))
             
-            self.logger.info(f"Validated {len(validated_ads)} out of {len(parsed_ads)} ads")
+            self.logger.debug(f"Validated {len(validated_ads)} out of {len(parsed_ads)} ads",
+                           invalid_count=len(parsed_ads) - len(validated_ads))
             return validated_ads
             
         except Exception as e:
@@ -476,6 +522,13 @@ class GeminiVehicleAnalysisCrew:
         if not data:
             return default_val
             
+        if isinstance(data, str):
+            # Fast path: most outputs are already clean JSON, so skip the string surgery
+            try:
+                return orjson.loads(data)
+            except orjson.JSONDecodeError:
+                pass
+
         try:
             if isinstance(data, str):
                 # Clean up the JSON string with multiple strategies
@@ -499,12 +552,12 @@ class GeminiVehicleAnalysisCrew:
                     if start_idx >= 0 and end_idx > start_idx:
                         cleaned_data = cleaned_data[start_idx:end_idx]
                 
-                return json.loads(cleaned_data)
+                return orjson.loads(cleaned_data)
             elif isinstance(data, list):
                 return data
             return default_val
             
-        except (json.JSONDecodeError, TypeError, ValueError) as e:
+        except (orjson.JSONDecodeError, TypeError, ValueError) as e:
             self.logger.warning(f"JSON parsing failed: {str(e)}", data_preview=str(data)[:200])
             
             # Try alternative parsing strategies
@@ -513,30 +566,24 @@ class GeminiVehicleAnalysisCrew:
                 if isinstance(data, str):
                     # Fix common issues like trailing commas, single quotes, etc.
                     fixed_data = data.replace("'", '"').replace(',]', ']').replace(',}', '}')
-                    return json.loads(fixed_data)
+                    return orjson.loads(fixed_data)
             except:
                 pass
                 
             return default_val
     
-    def _validate_ad_data(self, ad: dict) -> bool:
-        """
-        Validate that ad data contains required fields.
-        """
-        required_fields = ['ad_title', 'url']
-        return all(field in ad for field in required_fields)
-    
-    def _normalize_ad_data(self, ad: dict) -> dict:
+    def _normalize_ad_data(self, ad: ExtractedAd) -> dict:
         """
-        Normalize ad data with consistent field formatting.
+        Normalize a validated extractor ad straight into the AdDetails API format,
+        so the ads list is only traversed once.
         """
         normalized = {
-            'ad_title': str(ad.get('ad_title', 'Not Found')).strip(),
-            'price_lkr': self._normalize_price(ad.get('price_lkr', 'Not Found')),
-            'location': str(ad.get('location', 'Not Found')).strip(),
-            'mileage_km': self._normalize_mileage(ad.get('mileage_km', 'Not Found')),
-            'year': self._normalize_year(ad.get('year', 'Not Found')),
-            'url': str(ad.get('url', '')).strip()
+            'title': ad.ad_title,
+            'price': self._normalize_price(ad.price_lkr),
+            'location': ad.location or 'Not Found',
+            'mileage': self._normalize_mileage(ad.mileage_km),
+            'year': self._normalize_year(ad.year),
+            'link': ad.url
         }
         
         return normalized
@@ -548,7 +595,11 @@ class GeminiVehicleAnalysisCrew:
         if not price or price == 'Not Found':
             return 'Not Found'
         
-        price_str = str(price).replace('Rs.', '').replace('LKR', '').replace(',', '').strip()
+        # Already normalized (e.g. "2,450,000"); nothing to strip or reformat
+        if isinstance(price, str) and _GROUPED_NUMBER_RE.fullmatch(price):
+            return price
+        
+        price_str = _PRICE_NOISE_RE.sub('', str(price)).strip()
         
         try:
             # Try to parse as number and reformat
@@ -564,7 +615,11 @@ class GeminiVehicleAnalysisCrew:
         if not mileage or mileage == 'Not Found':
             return 'Not Found'
         
-        mileage_str = str(mileage).replace('km', '').replace(',', '').strip()
+        # Already normalized (e.g. "45,000 km"); nothing to strip or reformat
+        if isinstance(mileage, str) and mileage.endswith(' km') and _GROUPED_NUMBER_RE.fullmatch(mileage, 0, len(mileage) - 3):
+            return mileage
+        
+        mileage_str = _MILEAGE_NOISE_RE.sub('', str(mileage)).strip()
         
         try:
             # Try to parse as number
@@ -580,104 +635,192 @@ class GeminiVehicleAnalysisCrew:
         if not year or year == 'Not Found':
             return 'Not Found'
         
-        try:
-            year_num = int(float(str(year)))
-            if 1900 <= year_num <= 2030:
-                return str(year_num)
-            else:
-                return 'Not Found'
-        except (ValueError, TypeError):
-            return 'Not Found'
+        # Matches plain years as well as values like "2018 model" or 2018.0
+        match = _YEAR_RE.search(str(year))
+        if match and int(match.group()) <= 2030:
+            return match.group()
+        return 'Not Found'
     
-    def _convert_to_ad_details_format(self, ads_data):
+    def _store_comparison_in_database(self, vehicle1, vehicle2, comparison_report, metadata, analysis_session_id=None):
         """
-        Convert the agent output format to AdDetails format
-        Support both old format ("Ad Title") and new scraper format ("ad_title")
+        Store the comparison report in the database, under analysis_session_id when given.
+        Returns the new comparison's ID so the session's ads can link to it, or None on failure.
         """
-        converted_ads = []
-        for ad in ads_data:
-            if isinstance(ad, dict):
-                # Handle both old and new field formats
-                converted_ad = {
-                    "title": (ad.get("Ad Title") or ad.get("ad_title", "Not Found")),
-                    "price": (ad.get("Price (in LKR)") or ad.get("price_lkr", "Not Found")),
-                    "location": (ad.get("Location") or ad.get("location", "Not Found")),
-                    "mileage": (ad.get("Mileage (in km)") or ad.get("mileage_km", "Not Found")),
-                    "year": str(ad.get("Year of Manufacture") or ad.get("year", "Not Found")),
-                    "link": (ad.get("URL") or ad.get("url", "Not Found"))
-                }
-                converted_ads.append(converted_ad)
-        return converted_ads
-    def _store_comparison_in_database(self, vehicle1, vehicle2, comparison_report, metadata):
-        """
-        Store the comparison report in the database.
-        """
-        from app.core.db import SessionLocal
-        from app.crud.comparison_crud import create_comparison
-        db = SessionLocal()
+        from app.core.db import session_scope
+        from app.crud.comparison_crud import create_comparison_with_session_id
+        
+        if not analysis_session_id:
+            analysis_session_id = str(uuid4())
+        
         try:
-            stored_comparison = create_comparison(db, vehicle1, vehicle2, comparison_report, metadata)
+            # The ID is assigned by the flush, so no refresh round trip is needed after the commit
+            with session_scope() as db:
+                comparison_id = create_comparison_with_session_id(
+                    db, analysis_session_id, vehicle1, vehicle2, comparison_report, metadata, commit=False
+                ).id
             self.logger.info("Comparison report stored successfully", 
                             vehicle1=vehicle1, 
-                            vehicle2=vehicle2)
-            return stored_comparison
+                            vehicle2=vehicle2,
+                            comparison_id=comparison_id)
+            return comparison_id
         except Exception as e:
             self.logger.error("Failed to store comparison report", 
                             vehicle1=vehicle1, 
                             vehicle2=vehicle2, 
                             error=str(e))
-        finally:
-            db.close()
+            return None
 
-    def _execute_comparison_task_and_store(self, agents):
+    async def _execute_comparison_and_store(self, analysis_session_id):
+        """
+        Execute the comparison task and store a newly generated report right away,
+        so the write overlaps with the ad pipelines that are still running.
+        Returns (report, comparison_id, metadata); metadata is the stored report's
+        metadata when this run stored it, and None when it was reused or not stored.
+        """
+        comparison_report, metadata, comparison_id = await self._execute_comparison_task()
+        if metadata is not None:
+            comparison_id = await asyncio.to_thread(
+                self._store_comparison_in_database,
+                self.vehicle1, self.vehicle2, comparison_report, metadata, analysis_session_id
+            )
+            if comparison_id is None:
+                metadata = None
+        return comparison_report, comparison_id, metadata
+    
+    async def _execute_comparison_task(self):
         """
-        Execute only the comparison task and store the result immediately.
+        Execute only the comparison task.
+        Returns (report, metadata, comparison_id); metadata is None when the report
+        does not need storing because it was reused (comparison_id is then the
+        stored report's ID) or is a failure placeholder.
         """
         try:
-            # Create comparison task
-            tasks_manager = VehicleAnalysisTasks()
-            comparison_task = tasks_manager.vehicle_comparison_task(
-                agents['comparison'], self.vehicle1, self.vehicle2
-            )
-            
-            # Create a minimal crew for comparison task only
-            comparison_crew = Crew(
-                agents=[agents['comparison']],
-                tasks=[comparison_task],
-                process=Process.sequential,
-                verbose=True,
-                memory=False,
-                cache=True
+            # The comparison only depends on the vehicle pair, so reuse a stored report
+            stored = await asyncio.to_thread(self._get_stored_comparison_report)
+            if stored:
+                self.logger.debug("Reusing stored comparison report")
+                return stored[0], None, stored[1]
+            
+            # Execute comparison task, optionally racing redundant crews for lower tail latency
+            redundancy = max(1, settings.COMPARISON_REDUNDANCY)
+            self.logger.debug("Executing comparison task", redundancy=redundancy)
+            result = await self._kickoff_first_completed(
+                [self._create_comparison_crew() for _ in range(redundancy)]
             )
-            
-            # Execute comparison task
-            self.logger.info("Executing comparison task")
-            result = comparison_crew.kickoff()
+            self._log_token_usage("comparison", result)
             
             # Extract comparison report from result
             comparison_report = self._extract_comparison_from_result(result)
             
-            # Clean and store the comparison report immediately
-            self.logger.info("Cleaning and storing comparison report")
+            # Clean the comparison report; it is stored with the ads once they are ready
+            self.logger.debug("Cleaning comparison report")
             cleaned_report = self._clean_comparison_report(comparison_report)
+            if cleaned_report in _FAILED_COMPARISON_REPORTS:
+                return cleaned_report, None, None
             
-            # Store in database with metadata
             metadata = {
                 "llm_provider": "google-gemini",
                 "model": settings.GEMINI_MODEL,
                 "task_type": "comparison_only"
             }
+            return cleaned_report, metadata, None
             
-            self._store_comparison_in_database(
-                self.vehicle1, self.vehicle2, cleaned_report, metadata
-            )
-            
-            self.logger.info("Comparison report stored successfully")
-            return cleaned_report
-            
         except Exception as e:
-            self.logger.error("Failed to execute and store comparison task", error=str(e))
-            return "Error generating comparison report."
+            self.logger.error("Failed to execute comparison task", error=str(e))
+            return "Error generating comparison report.", None, None
+    
+    def _create_comparison_crew(self):
+        """
+        Create a minimal crew for the comparison task only.
+        """
+        from crewai import Crew, Process
+        
+        comparison_agent = self._create_gemini_agents(('comparison',))['comparison']
+        comparison_task = self._tasks_manager().vehicle_comparison_task(
+            comparison_agent, self.vehicle1, self.vehicle2
+        )
+        return Crew(
+            agents=[comparison_agent],
+            tasks=[comparison_task],
+            process=Process.sequential,
+            verbose=settings.VERBOSE,
+            memory=False,
+            cache=True,
+            max_rpm=settings.GEMINI_MAX_RPM
+        )
+    
+    async def _kickoff_first_completed(self, crews):
+        """
+        Run the given crews concurrently and return the first successful result.
+        The others are cancelled; if every crew fails, the last error is raised.
+        """
+        if len(crews) == 1:
+            return await _kickoff_with_llm_slot(crews[0])
+        
+        pending = {asyncio.create_task(_kickoff_with_llm_slot(crew)) for crew in crews}
+        error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            # A crew already running in a worker thread still finishes there and
+            # keeps its LLM slot until then; cancelling only stops waiting for it
+            for task in pending:
+                task.cancel()
+    
+    def _get_stored_comparison_report(self):
+        """
+        Return (report, comparison_id) for the most recent stored comparison of
+        this vehicle pair in any spelling or order, if any and not older than
+        COMPARISON_REPORT_TTL_SECONDS.
+        """
+        from app.core.db import session_scope
+        from app.crud.comparison_crud import get_comparison_by_vehicles
+        try:
+            # Read the columns inside the scope; the commit on exit expires the row
+            with session_scope() as db:
+                stored_comparison = get_comparison_by_vehicles(db, self.vehicle1, self.vehicle2)
+                if stored_comparison is None:
+                    return None
+                report = stored_comparison.comparison_report
+                comparison_id = stored_comparison.id
+                created_at = stored_comparison.created_at
+        except Exception as e:
+            self.logger.warning("Failed to look up stored comparison report", error=str(e))
+            return None
+        
+        if not report or report in _FAILED_COMPARISON_REPORTS:
+            return None
+        if settings.COMPARISON_REPORT_TTL_SECONDS and created_at:
+            # SQLite returns CURRENT_TIMESTAMP values as naive UTC
+            if created_at.tzinfo is None:
+                created_at = created_at.replace(tzinfo=timezone.utc)
+            max_age = timedelta(seconds=settings.COMPARISON_REPORT_TTL_SECONDS)
+            if datetime.now(timezone.utc) - created_at > max_age:
+                return None
+        return report, comparison_id
+    
+    def _log_token_usage(self, stage, result):
+        """
+        Log prompt/cached token counts so prompt prefix cache hits are visible.
+        """
+        usage = getattr(result, 'token_usage', None)
+        if usage is None:
+            return
+        prompt_tokens = getattr(usage, 'prompt_tokens', None) or 0
+        cached_prompt_tokens = getattr(usage, 'cached_prompt_tokens', None) or 0
+        self.logger.info("Crew token usage",
+                        stage=stage,
+                        prompt_tokens=prompt_tokens,
+                        cached_prompt_tokens=cached_prompt_tokens,
+                        prompt_cache_hit_ratio=round(cached_prompt_tokens / prompt_tokens, 2) if prompt_tokens else None,
+                        completion_tokens=getattr(usage, 'completion_tokens', None),
+                        total_tokens=getattr(usage, 'total_tokens', None))
     
     def _extract_comparison_from_result(self, result):
         """
@@ -697,62 +840,85 @@ class GeminiVehicleAnalysisCrew:
             self.logger.warning("Failed to extract comparison from result", error=str(e))
             return "Comparison report extraction failed."
     
-    def _create_ad_tasks(self, agents):
+    def _create_ad_tasks(self, agents, vehicle):
         """
-        Create only ad finding and extraction tasks (excluding comparison).
+        Create the ad finding and extraction tasks for a single vehicle.
         """
-        tasks_manager = VehicleAnalysisTasks()
-        tasks = []
-        
-        # Ad finding tasks
-        find_ads_v1 = tasks_manager.find_ads_task(agents['ad_finder'], self.vehicle1)
-        find_ads_v2 = tasks_manager.find_ads_task(agents['ad_finder'], self.vehicle2)
-        tasks.extend([find_ads_v1, find_ads_v2])
+        tasks_manager = self._tasks_manager()
         
-        # Details extraction tasks
-        extract_v1 = tasks_manager.extract_details_task(
-            agents['details_extractor'], self.vehicle1, find_ads_v1
+        find_ads = tasks_manager.find_ads_task(agents['ad_finder'], vehicle)
+        extract_details = tasks_manager.extract_details_task(
+            agents['details_extractor'], vehicle, find_ads
         )
-        extract_v2 = tasks_manager.extract_details_task(
-            agents['details_extractor'], self.vehicle2, find_ads_v2
-        )
-        tasks.extend([extract_v1, extract_v2])
         
-        return tasks
+        return [find_ads, extract_details]
+    
+    async def _run_ad_pipeline(self, vehicle):
+        """
+        Find and extract ads for one vehicle.
+        Returns a list of extracted ads, or the raw output of the extraction task
+        when the LLM crew had to be used.
+        """
+        from app.tools.sri_lankan_scraper import find_sale_ad_urls
+        from app.tools.sync_beautifulsoup_scraper import batch_extract_ad_details_async
+        
+        # Search for ad URLs and scrape them directly; the extractor agent would
+        # only relay the scraper tool's JSON, so no LLM call is needed here
+        ad_urls = await asyncio.to_thread(find_sale_ad_urls, vehicle)
+        if ad_urls:
+            self.logger.debug("Found ad URLs via direct search", vehicle=vehicle, url_count=len(ad_urls))
+            extracted_ads = await batch_extract_ad_details_async(ad_urls)
+            # Pages that failed to load come back as "Error" placeholders
+            return [ad for ad in extracted_ads if ad.get("price_lkr") != "Error"]
+        
+        # Fall back to the LLM ad finder + extractor crew when direct search finds nothing
+        pipeline_agents = self._create_gemini_agents(('ad_finder', 'details_extractor'))
+        tasks = self._create_ad_tasks(pipeline_agents, vehicle)
+        crew = self._create_gemini_crew(pipeline_agents, tasks)
+        
+        result = await _kickoff_with_llm_slot(crew)
+        self._log_token_usage("ad_processing", result)
+        
+        return result.raw if hasattr(result, 'raw') else str(result)
     
-    def _parse_crew_result_with_comparison(self, result, comparison_report):
+    def _parse_crew_result_with_comparison(self, ad_outputs, comparison_report, analysis_session_id,
+                                           comparison_id=None, comparison_metadata=None):
         """
-        Parse crew result and combine with pre-stored comparison report.
+        Parse per-vehicle ad outputs, store the ads and combine them with the
+        comparison report, which was already stored as soon as it finished.
+        Stored ads are linked to comparison_id when given, and comparison_metadata
+        (set when this run stored the comparison) is updated with the ad counts.
         """
         try:
-            # Parse ad results (skip comparison parsing since it's already stored)
-            parsed_results = self._extract_task_outputs(result) if result else {}
-            
-            # Generate unique analysis session ID FIRST
-            from uuid import uuid4
-            analysis_session_id = str(uuid4())
+            # Ad outputs are already keyed per vehicle (comparison is stored separately)
+            parsed_results = ad_outputs or {}
             
             # Extract ad data with intelligent parsing
             vehicle1_ads = self._parse_and_validate_ads(parsed_results.get('vehicle1_ads', []))
             vehicle2_ads = self._parse_and_validate_ads(parsed_results.get('vehicle2_ads', []))
             
-            # Store ads in database with session ID for tracking
-            stored_ads = self._store_ads_in_database_safe(vehicle1_ads + vehicle2_ads, analysis_session_id)
-            self.logger.info(f"Successfully stored {len(stored_ads)} ads in database with session tracking")
+            # Both searches can return the same ad; keep it for the first vehicle only
+            seen_urls = set()
+            vehicle1_ads = self._dedupe_ads_by_url(vehicle1_ads, seen_urls)
+            vehicle2_ads = self._dedupe_ads_by_url(vehicle2_ads, seen_urls)
             
-            # Convert to expected API format
-            vehicle1_ads_formatted = self._convert_to_ad_details_format(vehicle1_ads)
-            vehicle2_ads_formatted = self._convert_to_ad_details_format(vehicle2_ads)
+            # Tag each ad with the session and its vehicle for the API payload;
+            # the stored rows are copies of these with the comparison ID added
+            self._add_session_data_to_ads(vehicle1_ads, analysis_session_id, self.vehicle1)
+            self._add_session_data_to_ads(vehicle2_ads, analysis_session_id, self.vehicle2)
             
-            # Add session ID and vehicle name to each ad
-            self._add_session_data_to_ads(vehicle1_ads_formatted, analysis_session_id, self.vehicle1)
-            self._add_session_data_to_ads(vehicle2_ads_formatted, analysis_session_id, self.vehicle2)
+            # Store all ads in one transaction, linked to the comparison they were analysed with
+            stored_ads = self._store_ads_in_database_safe(
+                vehicle1_ads + vehicle2_ads, analysis_session_id,
+                comparison_id=comparison_id, comparison_metadata=comparison_metadata
+            )
+            self.logger.debug(f"Successfully stored {len(stored_ads)} ads in database with session tracking")
 
             return {
                 "analysis_session_id": analysis_session_id,
                 "comparison_report": comparison_report,  # Use pre-stored comparison
-                "vehicle1_ads": vehicle1_ads_formatted,
-                "vehicle2_ads": vehicle2_ads_formatted,
+                "vehicle1_ads": vehicle1_ads,
+                "vehicle2_ads": vehicle2_ads,
                 "vehicle1_name": self.vehicle1,
                 "vehicle2_name": self.vehicle2,
                 "metadata": {
@@ -766,9 +932,6 @@ class GeminiVehicleAnalysisCrew:
             
         except Exception as e:
             self.logger.error(f"Failed to parse ad results: {str(e)}", exc_info=True)
-            # Generate a unique analysis session ID even for errors
-            from uuid import uuid4
-            analysis_session_id = str(uuid4())
             
             return {
                 "analysis_session_id": analysis_session_id,
@@ -786,66 +949,6 @@ class GeminiVehicleAnalysisCrew:
                 }
             }
 
-    def _parse_crew_result(self, result) -> dict:
-        """
-        Parses the crew output and stores ads in database with improved error handling.
-        """
-        try:
-            # Enhanced result parsing with better format detection
-            parsed_results = self._extract_task_outputs(result)
-            
-            # Extract comparison report
-            comparison_report = parsed_results.get('comparison', "Comparison report not generated.")
-            
-            # Extract ad data with intelligent parsing
-            vehicle1_ads = self._parse_and_validate_ads(parsed_results.get('vehicle1_ads', []))
-            vehicle2_ads = self._parse_and_validate_ads(parsed_results.get('vehicle2_ads', []))
-            
-            # Store ads in database with improved transaction handling
-            stored_ads = self._store_ads_in_database_safe(vehicle1_ads + vehicle2_ads)
-            self.logger.info(f"Successfully stored {len(stored_ads)} ads in database")
-            
-            # Store comparison report in database
-            stored_comparison = self._store_comparison_in_database(
-                self.vehicle1, self.vehicle2, comparison_report, {
-                    "total_ads_found": len(vehicle1_ads) + len(vehicle2_ads),
-                    "ads_stored": len(stored_ads),
-                    "llm_provider": "google-gemini",
-                    "model": settings.GEMINI_MODEL
-                }
-            )
-            
-            # Convert to expected API format
-            vehicle1_ads_formatted = self._convert_to_ad_details_format(vehicle1_ads)
-            vehicle2_ads_formatted = self._convert_to_ad_details_format(vehicle2_ads)
-
-            return {
-                "comparison_report": comparison_report,
-                "vehicle1_ads": vehicle1_ads_formatted,
-                "vehicle2_ads": vehicle2_ads_formatted,
-                "metadata": {
-                    "total_ads_found": len(vehicle1_ads) + len(vehicle2_ads),
-                    "ads_stored": len(stored_ads),
-                    "parsing_success": True,
-                    "llm_provider": "google-gemini"
-                }
-            }
-            
-        except Exception as e:
-            self.logger.error(f"Failed to parse crew result: {str(e)}", exc_info=True)
-            return {
-                "comparison_report": "Error generating comparison report.",
-                "vehicle1_ads": [],
-                "vehicle2_ads": [],
-                "metadata": {
-                    "total_ads_found": 0,
-                    "ads_stored": 0,
-                    "parsing_success": False,
-                    "error": str(e),
-                    "llm_provider": "google-gemini"
-                }
-            }
-    
     def _add_session_data_to_ads(self, ads_list, analysis_session_id, vehicle_name):
         """Add session ID and vehicle name to each ad in the list"""
         for ad in ads_list:
@@ -2,9 +2,14 @@
 from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
 from app.schemas.vehicle_schemas import VehicleAnalysisRequest, VehicleAnalysisResponse, AdDetails
-from app.gemini_crew import GeminiVehicleAnalysisCrew
+from app.gemini_crew import GeminiVehicleAnalysisCrew, SameVehicleError
 from app.core.config import settings
+from app.core.db import ensure_columns, ensure_indexes, session_scope
+from app.crud.comparison_crud import backfill_pair_keys
 from app.utils.ad_stats import filter_and_stats
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+import asyncio
 import structlog
 import coloredlogs
 import logging
@@ -12,6 +17,7 @@ import logging
 # Configure structlog
 structlog.configure(
     processors=[
+        structlog.contextvars.merge_contextvars,
         structlog.processors.TimeStamper(fmt="ISO"),
         structlog.processors.add_log_level,
         structlog.processors.StackInfoRenderer(),
@@ -19,7 +25,8 @@ structlog.configure(
     ],
     context_class=dict,
     logger_factory=structlog.stdlib.LoggerFactory(),
-    wrapper_class=structlog.stdlib.BoundLogger,
+    # Level filtering happens before any processor runs, so debug calls are no-ops
+    wrapper_class=structlog.make_filtering_bound_logger(logging.DEBUG if settings.DEBUG else logging.INFO),
     cache_logger_on_first_use=True,
 )
 
@@ -51,17 +58,40 @@ async def _select_optimal_crew(vehicle1: str, vehicle2: str):
         logger.info("Selecting Gemini crew (free tier with generous quotas)", 
                    vehicle1=vehicle1, vehicle2=vehicle2, 
                    provider="google-gemini", model=settings.GEMINI_MODEL)
-        return GeminiVehicleAnalysisCrew(vehicle1, vehicle2)
+        # Construction verifies the API key with a blocking LLM call
+        return await asyncio.to_thread(GeminiVehicleAnalysisCrew, vehicle1, vehicle2)
+    except SameVehicleError:
+        raise  # A bad request, not an initialization failure; analyze_vehicles answers 400
     except Exception as e:
         logger.error("Gemini crew initialization failed", 
                     error=str(e), error_type=type(e).__name__,
                     vehicle1=vehicle1, vehicle2=vehicle2)
         raise
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Crew kickoffs, scraping and DB writes run on the default thread pool,
+    so size it for several concurrent analyses; it is shut down with the app.
+    Columns and indexes added to the models since the database was created are
+    built first, and comparisons stored before pair_key existed get one.
+    """
+    ensure_columns()
+    ensure_indexes()
+    with session_scope() as db:
+        backfill_pair_keys(db)
+    executor = ThreadPoolExecutor(max_workers=32)
+    asyncio.get_running_loop().set_default_executor(executor)
+    try:
+        yield
+    finally:
+        executor.shutdown(wait=True)
+
 app = FastAPI(
     title="AI Vehicle Analyst API",
     description="An API to compare vehicles and find local ads using a crew of AI agents.",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configure CORS middleware
@@ -94,13 +124,13 @@ async def analyze_vehicles(request: VehicleAnalysisRequest):
                       vehicle1=request.vehicle1, 
                       vehicle2=request.vehicle2)
         raise HTTPException(status_code=400, detail="Both vehicle1 and vehicle2 must be provided.")
-        
+    
     try:
         # Intelligent crew selection based on provider configuration
         crew = await _select_optimal_crew(request.vehicle1, request.vehicle2)
         
         logger.info("Starting crew execution")
-        result = crew.run() # This now returns a structured dictionary
+        result = await crew.run() # This now returns a structured dictionary
         logger.info("Crew execution completed successfully")
         
         # Validate the dictionary with our Pydantic response model
@@ -112,6 +142,13 @@ async def analyze_vehicles(request: VehicleAnalysisRequest):
                    ads_found_v2=len(validated_result.vehicle2_ads))
         return validated_result
 
+    except SameVehicleError as e:
+        # The crew rejects two spellings of the same vehicle before any LLM call
+        logger.warning("Validation failed: Same vehicle given twice", 
+                      vehicle1=request.vehicle1, 
+                      vehicle2=request.vehicle2)
+        raise HTTPException(status_code=400, detail=str(e))
+
     except Exception as e:
         error_msg = str(e)
         
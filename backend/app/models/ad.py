@@ -1,11 +1,15 @@
 # app/models/ad.py
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.core.db import Base
 
 class Ad(Base):
     __tablename__ = "ads"
+    __table_args__ = (
+        Index("ix_ads_session_vehicle", "analysis_session_id", "vehicle_name"),
+        Index("ix_ads_year_location", "year", "location"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, index=True)
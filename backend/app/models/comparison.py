@@ -1,16 +1,20 @@
 # app/models/comparison.py
-from sqlalchemy import Column, Integer, String, Text, DateTime
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.core.db import Base
 
 class VehicleComparison(Base):
     __tablename__ = "vehicle_comparisons"
+    __table_args__ = (
+        Index("ix_vehicle_comparisons_pair_key_created", "pair_key", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     analysis_session_id = Column(String, unique=True, index=True)  # Unique session identifier
     vehicle1 = Column(String, index=True)
     vehicle2 = Column(String, index=True)
+    pair_key = Column(String)  # comparison_pair_key(vehicle1, vehicle2); same for any spelling or order
     comparison_report = Column(Text)
     metadata_info = Column(Text)  # JSON string for additional metadata
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -1,5 +1,5 @@
 # app/schemas/vehicle_schemas.py
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import List, Optional
 
 class VehicleAnalysisRequest(BaseModel):
@@ -7,6 +7,17 @@ class VehicleAnalysisRequest(BaseModel):
     vehicle1: str
     vehicle2: str
 
+class ExtractedAd(BaseModel):
+    """Model for a single ad as returned by the details extractor agent."""
+    model_config = ConfigDict(str_strip_whitespace=True, coerce_numbers_to_str=True)
+
+    ad_title: str
+    url: str
+    price_lkr: Optional[str] = "Not Found"
+    location: Optional[str] = "Not Found"
+    mileage_km: Optional[str] = "Not Found"
+    year: Optional[str] = "Not Found"
+
 class AdDetails(BaseModel):
     """Model for individual advertisement details."""
     title: str
@@ -2,11 +2,35 @@
 # AI-friendly web search tool with structured output and vehicle-specific capabilities
 from crewai.tools import BaseTool
 import requests
+from requests.adapters import HTTPAdapter
 import os
 import json
-from typing import Dict, Any, Type, List, Optional
+from typing import Dict, Type, List, Optional
 from pydantic import BaseModel, Field
-import re
+
+_SERPER_SEARCH_URL = "https://google.serper.dev/search"
+
+# Shared keep-alive session so repeated Serper calls reuse pooled TLS connections
+_serper_session = requests.Session()
+_serper_session.mount("https://", HTTPAdapter(pool_connections=32, pool_maxsize=32))
+
+def serper_search(query: str, api_key: str, limit: int = 5) -> Dict:
+    """Run a Serper web search over the shared session and return the raw JSON response"""
+    payload = {
+        "q": query,
+        "num": min(limit, 10)  # API limit
+    }
+    headers = {
+        "X-API-KEY": api_key,
+        "Content-Type": "application/json"
+    }
+    
+    response = _serper_session.post(_SERPER_SEARCH_URL, json=payload, headers=headers, timeout=15)
+    
+    if response.status_code == 200:
+        return response.json()
+    else:
+        raise Exception(f"API returned status {response.status_code}: {response.text}")
 
 class SearchToolInput(BaseModel):
     """Input schema for AI-friendly SearchTool."""
@@ -93,22 +117,7 @@ class AIFriendlySearchTool(BaseTool):
     
     def _make_search_request(self, query: str, api_key: str, limit: int) -> Optional[Dict]:
         """Make search API request"""
-        url = "https://google.serper.dev/search"
-        payload = {
-            "q": query,
-            "num": min(limit, 10)  # API limit
-        }
-        headers = {
-            "X-API-KEY": api_key,
-            "Content-Type": "application/json"
-        }
-        
-        response = requests.post(url, json=payload, headers=headers, timeout=15)
-        
-        if response.status_code == 200:
-            return response.json()
-        else:
-            raise Exception(f"API returned status {response.status_code}: {response.text}")
+        return serper_search(query, api_key, limit)
     
     def _process_search_results(self, data: Dict, original_query: str, search_type: str, limit: int) -> SearchResponse:
         """Process raw search results into structured format"""
@@ -5,9 +5,101 @@ from bs4 import BeautifulSoup
 import re
 import json
 import asyncio
-from typing import Dict, Any, Type, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Type, List
 from pydantic import BaseModel, Field
-import time
+from urllib.parse import urlsplit
+from app.tools.search_tool import serper_search
+import os
+import structlog
+
+logger = structlog.get_logger()
+
+# URL/title filters compiled once as single alternations, so each candidate is
+# scanned in one pass instead of one substring test per keyword
+# Keywords match anywhere in the URL, as in /autoparts/ or /vehicle-servicecentre
+_EXCLUDE_RE = re.compile(
+    r"(?i)(?:rent|hire|leas(?:e|ing)|parts|spare|accessories|tyre|tire|battery"
+    r"|service|repair|maintenance|workshop|insurance|finance|loan)"
+)
+_TITLE_EXCLUDE_RE = re.compile(
+    r"(?:rent|hire|lease|parts|spare|accessories|service|repair|workshop)"
+)
+_AD_PATH_RE = re.compile(r"/ad/[^/]+")
+# Individual patpat.lk listings sit at least two segments below /vehicle/,
+# category pages (/vehicle/car, /vehicle/bike, ...) do not count
+_PATPAT_LISTING_PATH_RE = re.compile(
+    r"^/vehicle/(?!(?:all|bike|car|bus|heavy|land|three|van))[^/]+/[^/]+"
+)
+
+# Each site only needs its own rule: host -> (literal token prefilter, path regex)
+_LISTING_RULES_BY_HOST = {
+    "ikman.lk": ("/ad/", _AD_PATH_RE),
+    "riyasewana.com": ("/ad/", _AD_PATH_RE),
+    "patpat.lk": ("/vehicle/", _PATPAT_LISTING_PATH_RE),
+}
+
+def is_sale_url(url: str) -> bool:
+    """
+    Return True if the URL is an individual sale listing on a supported
+    Sri Lankan site and contains none of the rental/parts/service keywords.
+    """
+    parts = urlsplit(url)
+    host = (parts.hostname or "").removeprefix("www.")
+    rule = _LISTING_RULES_BY_HOST.get(host)
+    if rule is None:
+        return False
+    
+    token, path_re = rule
+    path = parts.path
+    if token not in path or not path_re.search(path):
+        return False
+    return _EXCLUDE_RE.search(path) is None
+
+# Site-restricted Serper queries for sale ads; built in code so finding ad URLs
+# doesn't need an LLM round-trip
+_SALE_QUERY_TEMPLATES = (
+    "site:ikman.lk/en/ad {vehicle} for sale",
+    "site:riyasewana.com/ad {vehicle} sale",
+)
+
+# Shared by every find_sale_ad_urls call (two per analysis, one per vehicle), so the
+# per-site queries run concurrently without a new thread pool per call
+_SALE_QUERY_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix="sale-query")
+
+def build_sale_queries(vehicle_name: str) -> List[str]:
+    """Build the Serper queries used to find sale ads for a vehicle"""
+    return [template.format(vehicle=vehicle_name) for template in _SALE_QUERY_TEMPLATES]
+
+def find_sale_ad_urls(vehicle_name: str, limit: int = 5) -> List[str]:
+    """
+    Find sale ad URLs for a vehicle with direct Serper searches.
+    Returns an empty list if Serper is not configured or nothing usable was found.
+    """
+    api_key = os.getenv("SERPER_API_KEY")
+    if not api_key:
+        return []
+    
+    def search(query):
+        try:
+            return serper_search(query, api_key, limit=10)
+        except Exception as e:
+            logger.warning("Serper sale ad search failed", query=query, error=str(e))
+            return {}
+    
+    # The per-site queries are independent, so run them concurrently;
+    # map() keeps the results in template order
+    queries = build_sale_queries(vehicle_name)
+    responses = list(_SALE_QUERY_EXECUTOR.map(search, queries))
+    
+    urls = []
+    for response_data in responses:
+        for result in response_data.get("organic", []):
+            url = result.get("link", "")
+            if url and url not in urls and is_sale_url(url):
+                urls.append(url)
+    
+    return urls[:limit]
 
 class SriLankanScraperInput(BaseModel):
     """Input schema for Sri Lankan scraper tool."""
@@ -51,20 +143,8 @@ class SriLankanAdScraperTool(BaseTool):
         ad_urls.extend(patpat_urls)
         print(f"Found {len(patpat_urls)} URLs from patpat.lk")
 
-        # Filter valid ad URLs from all sites
-        filtered_urls = []
-        for url in ad_urls:
-            # Accept ads from ikman.lk and riyasewana.com with /ad/ pattern
-            if "/ad/" in url and ("ikman.lk" in url or "riyasewana.com" in url):
-                filtered_urls.append(url)
-            # For patpat.lk, be more selective - exclude obvious category pages
-            elif ("/vehicle/" in url and "patpat.lk" in url and 
-                  not any(skip in url for skip in ['/vehicle/all', '/vehicle/bike', '/vehicle/car', 
-                                                  '/vehicle/bus', '/vehicle/heavy', '/vehicle/land', 
-                                                  '/vehicle/three', '/vehicle/van'])):
-                # Only include if URL seems like a specific listing (has more path segments)
-                if len([x for x in url.split('/') if x]) > 4:
-                    filtered_urls.append(url)
+        # Filter valid sale ad URLs from all sites
+        filtered_urls = [url for url in ad_urls if is_sale_url(url)]
         
         # If we have very few results, add some mock URLs for demonstration
         if len(filtered_urls) < 3:
@@ -154,36 +234,21 @@ class SriLankanAdScraperTool(BaseTool):
     async def _filter_sale_ads_only(self, urls: List[str]) -> List[str]:
         """Filter URLs to include only vehicle sale ads, exclude rentals, parts, services"""
         filtered_urls = []
-        
-        # Keywords that indicate NON-SALE ads (rentals, parts, services)
-        exclude_keywords = [
-            'rent', 'rental', 'hire', 'lease', 'leasing',
-            'parts', 'spare', 'accessories', 'tyre', 'tire', 'battery',
-            'service', 'repair', 'maintenance', 'workshop',
-            'insurance', 'finance', 'loan'
-        ]
-        
-        # Keywords that indicate SALE ads
-        include_keywords = [
-            'sale', 'sell', 'selling', 'for-sale'
-        ]
+        keyword_excluded = 0
         
         for url in urls:
-            url_lower = url.lower()
-            
-            # Check if URL contains exclude keywords
-            has_exclude_keywords = any(keyword in url_lower for keyword in exclude_keywords)
-            
-            if not has_exclude_keywords:
+            # Check if URL contains exclude keywords (rentals, parts, services)
+            if _EXCLUDE_RE.search(url) is None:
                 # Additional validation by checking page title if possible
                 if await self._is_vehicle_sale_ad(url):
                     filtered_urls.append(url)
-                    print(f"✅ Included sale ad: {url}")
-                else:
-                    print(f"❌ Excluded non-sale ad: {url}")
             else:
-                print(f"❌ Excluded by URL keywords: {url}")
+                keyword_excluded += 1
         
+        # One summary line per batch instead of one line per URL
+        print(f"Kept {len(filtered_urls)} of {len(urls)} URLs as sale ads "
+              f"({keyword_excluded} excluded by URL keywords, "
+              f"{len(urls) - len(filtered_urls) - keyword_excluded} by page title)")
         return filtered_urls
     
     async def _is_vehicle_sale_ad(self, url: str) -> bool:
@@ -194,8 +259,7 @@ class SriLankanAdScraperTool(BaseTool):
             soup = BeautifulSoup(response.content, 'html.parser')
             title = soup.find('h1').text.lower() if soup.find('h1') else ""
             
-            exclude_in_title = ['rent', 'rental', 'hire', 'lease', 'parts', 'spare', 'accessories', 'service', 'repair', 'workshop']
-            if any(keyword in title for keyword in exclude_in_title):
+            if _TITLE_EXCLUDE_RE.search(title):
                 return False
 
             include_in_title = ['sale', 'sell', 'selling']
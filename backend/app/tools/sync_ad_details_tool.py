@@ -1,9 +1,12 @@
 # app/tools/sync_ad_details_tool.py
 from crewai.tools import BaseTool
-from app.tools.sync_beautifulsoup_scraper import batch_extract_ad_details_sync, extract_ad_details_sequential
-from typing import Dict, Any, Type, List
+from app.tools.sync_beautifulsoup_scraper import (
+    batch_extract_ad_details_async, batch_extract_ad_details_sync, extract_ad_details_sequential
+)
+from typing import Type, List
+import asyncio
 from pydantic import BaseModel, Field
-import json
+import orjson
 
 class SyncAdDetailsExtractorInput(BaseModel):
     """Input schema for SyncAdDetailsExtractorTool."""
@@ -12,23 +15,31 @@ class SyncAdDetailsExtractorInput(BaseModel):
 
 class SyncAdDetailsExtractorTool(BaseTool):
     name: str = "Sync Ad Details Extractor"
-    description: str = "Extracts structured ad details from URLs using synchronous requests and BeautifulSoup. No AsyncIO conflicts."
+    description: str = "Extracts structured ad details from URLs using concurrent HTTP requests and lxml. No AsyncIO conflicts."
     args_schema: Type[BaseModel] = SyncAdDetailsExtractorInput
 
     def _run(self, urls: List[str], parallel: bool = True) -> str:
         """Synchronous execution of the tool - no async needed."""
         try:
             if parallel:
-                # Use parallel processing with ThreadPoolExecutor
-                results = batch_extract_ad_details_sync(urls, max_workers=3)
+                # Fetch all pages concurrently over a shared async HTTP client
+                results = batch_extract_ad_details_sync(urls)
             else:
                 # Use sequential processing for maximum reliability
                 results = extract_ad_details_sequential(urls)
             
-            return json.dumps(results, indent=2)
+            return orjson.dumps(results, option=orjson.OPT_INDENT_2).decode()
         except Exception as e:
-            return json.dumps({"error": f"Failed to extract details: {str(e)}"})
+            return orjson.dumps({"error": f"Failed to extract details: {str(e)}"}).decode()
 
     async def _arun(self, urls: List[str], parallel: bool = True) -> str:
-        """Asynchronous execution - just calls the sync version."""
-        return self._run(urls, parallel)
+        """Asynchronous execution - awaits the async extractor on the caller's event loop."""
+        try:
+            if parallel:
+                results = await batch_extract_ad_details_async(urls)
+            else:
+                results = await asyncio.to_thread(extract_ad_details_sequential, urls)
+            
+            return orjson.dumps(results, option=orjson.OPT_INDENT_2).decode()
+        except Exception as e:
+            return orjson.dumps({"error": f"Failed to extract details: {str(e)}"}).decode()
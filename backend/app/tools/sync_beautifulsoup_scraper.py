@@ -1,59 +1,87 @@
 # app/tools/sync_beautifulsoup_scraper.py
 import requests
-from bs4 import BeautifulSoup
+import httpx
+import asyncio
+from lxml import html as lxml_html
+from lxml.etree import ParserError, XPath
 import re
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
+from app.core.config import settings
 import time
-import concurrent.futures
 
-def extract_ad_details_sync(url: str) -> Dict[str, Any]:
+# XPath expressions are compiled once and reused for every ad page
+_TITLE_XPATH = XPath('//h1')
+_PRICE_XPATH = XPath('//*[@data-testid="price"]')
+_SUBLOCATION_XPATH = XPath('//*[@data-testid="subtitle-sublocation-link"]')
+_PARENTLOCATION_XPATH = XPath('//*[@data-testid="subtitle-parentlocation-link"]')
+_BODY_TEXT_XPATH = XPath('//text()[not(ancestor::script) and not(ancestor::style)]')
+_MILEAGE_RE = re.compile(r'(\d{1,3}(?:,\d{3})*|\d+)\s*km', re.IGNORECASE)
+_YEAR_RE = re.compile(r'\b(19|20)\d{2}\b')
+
+def _first_text(tree, xpath):
+    elements = xpath(tree)
+    return elements[0].text_content().strip() if elements else None
+
+def _parse_ad_html(content, url: str) -> Dict[str, Any]:
     """
-    Synchronously extracts ad details from a given URL using requests and BeautifulSoup.
+    Parses the ad details out of an ad page's HTML using lxml.
     """
-    response = None
     try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.content, 'html.parser')
+        tree = lxml_html.document_fromstring(content)
+    except ParserError:
+        # Empty document - nothing to extract
+        tree = lxml_html.document_fromstring("<html></html>")
 
-        # Extract title
-        title_element = soup.find('h1')
-        title = title_element.text.strip() if title_element else "Not Found"
+    # Extract title and price
+    title = _first_text(tree, _TITLE_XPATH) or "Not Found"
+    price = _first_text(tree, _PRICE_XPATH) or "Not Found"
 
-        # Extract price
-        price_element = soup.find(attrs={"data-testid": "price"})
-        price = price_element.text.strip() if price_element else "Not Found"
+    # Extract location
+    sublocation = _first_text(tree, _SUBLOCATION_XPATH)
+    parentlocation = _first_text(tree, _PARENTLOCATION_XPATH)
+    location = ", ".join(filter(None, [sublocation, parentlocation])) or "Not Found"
+
+    # Extract mileage and year from page content
+    body_content = "".join(_BODY_TEXT_XPATH(tree))
+    
+    mileage = "Not Found"
+    mileage_match = _MILEAGE_RE.search(body_content)
+    if mileage_match:
+        mileage = mileage_match.group()
 
-        # Extract location
-        sublocation_element = soup.find(attrs={"data-testid": "subtitle-sublocation-link"})
-        sublocation = sublocation_element.text.strip() if sublocation_element else None
-        
-        parentlocation_element = soup.find(attrs={"data-testid": "subtitle-parentlocation-link"})
-        parentlocation = parentlocation_element.text.strip() if parentlocation_element else None
-        
-        location = ", ".join(filter(None, [sublocation, parentlocation])) or "Not Found"
+    year = "Not Found"
+    year_match = _YEAR_RE.search(body_content)
+    if year_match:
+        year = year_match.group()
 
-        # Extract mileage and year from page content
-        body_content = soup.get_text()
-        
-        mileage = "Not Found"
-        mileage_match = re.search(r'(\d{1,3}(?:,\d{3})*|\d+)\s*km', body_content, re.IGNORECASE)
-        if mileage_match:
-            mileage = mileage_match.group()
+    return {
+        "ad_title": title,
+        "price_lkr": price,
+        "location": location,
+        "mileage_km": mileage,
+        "year": year,
+        "url": url
+    }
 
-        year = "Not Found"
-        year_match = re.search(r'\b(19|20)\d{2}\b', body_content)
-        if year_match:
-            year = year_match.group()
+def _error_result(url: str, error: Exception) -> Dict[str, Any]:
+    return {
+        "ad_title": f"Error: {error}",
+        "price_lkr": "Error",
+        "location": "Error",
+        "mileage_km": "Error",
+        "year": "Error",
+        "url": url
+    }
 
-        return {
-            "ad_title": title,
-            "price_lkr": price,
-            "location": location,
-            "mileage_km": mileage,
-            "year": year,
-            "url": url
-        }
+def extract_ad_details_sync(url: str) -> Dict[str, Any]:
+    """
+    Synchronously extracts ad details from a given URL using requests and lxml.
+    """
+    response = None
+    try:
+        response = requests.get(url, timeout=10)
+        response.raise_for_status()
+        return _parse_ad_html(response.content, url)
     except requests.RequestException as e:
         # Check if we got a response and if it's a 410 error
         if response is not None and hasattr(response, 'status_code') and response.status_code == 410:
@@ -64,48 +92,52 @@ def extract_ad_details_sync(url: str) -> Dict[str, Any]:
         if '410' in str(e) or 'Gone' in str(e):
             print(f"Excluding URL due to 410 Gone error: {url}")
             return None
-        return {
-            "ad_title": f"Error: {e}",
-            "price_lkr": "Error",
-            "location": "Error",
-            "mileage_km": "Error",
-            "year": "Error",
-            "url": url
-        }
+        return _error_result(url, e)
 
-def batch_extract_ad_details_sync(urls: List[str], max_workers: int = 5) -> List[Dict[str, Any]]:
+async def _fetch_ad_details(client: httpx.AsyncClient, semaphore: asyncio.Semaphore, url: str) -> Dict[str, Any]:
     """
-    Extract ad details from multiple URLs using ThreadPoolExecutor for parallel processing.
+    Fetches and parses a single ad page, bounded by the shared semaphore.
+    """
+    try:
+        async with semaphore:
+            response = await client.get(url)
+        if response.status_code == 410:
+            # Exclude 410 Gone errors silently
+            print(f"Excluding URL due to 410 Gone: {url}")
+            return None
+        response.raise_for_status()
+        return _parse_ad_html(response.content, url)
+    except Exception as e:
+        return _error_result(url, e)
+
+async def batch_extract_ad_details_async(urls: List[str], max_concurrency: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Extract ad details from multiple URLs concurrently over a single HTTP client.
+    max_concurrency bounds the number of in-flight requests (AD_SCRAPER_MAX_CONCURRENCY by default).
     """
     if not urls:
         return []
     
-    results = []
+    semaphore = asyncio.Semaphore(max_concurrency or settings.AD_SCRAPER_MAX_CONCURRENCY)
+    async with httpx.AsyncClient(timeout=10, follow_redirects=True) as client:
+        results = await asyncio.gather(*(_fetch_ad_details(client, semaphore, url) for url in urls))
     
-    # Use ThreadPoolExecutor for parallel requests
-    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-        # Submit all tasks
-        future_to_url = {executor.submit(extract_ad_details_sync, url): url for url in urls}
-        
-        # Collect results as they complete
-        for future in concurrent.futures.as_completed(future_to_url, timeout=60):
-            try:
-                result = future.result()
-                if result is not None:
-                    results.append(result)
-            except Exception as e:
-                url = future_to_url[future]
-                error_result = {
-                    "ad_title": f"Error: {e}",
-                    "price_lkr": "Error",
-                    "location": "Error",
-                    "mileage_km": "Error",
-                    "year": "Error",
-                    "url": url
-                }
-                results.append(error_result)
+    return [result for result in results if result is not None]
+
+def batch_extract_ad_details_sync(urls: List[str], max_workers: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Synchronous entry point for the concurrent extractor, for callers without an event loop.
+    max_workers bounds the number of in-flight requests (AD_SCRAPER_MAX_CONCURRENCY by default).
+    Async callers should await batch_extract_ad_details_async instead.
+    """
+    if not urls:
+        return []
     
-    return results
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(batch_extract_ad_details_async(urls, max_workers))
+    raise RuntimeError("batch_extract_ad_details_sync cannot run inside an event loop; await batch_extract_ad_details_async instead")
 
 def extract_ad_details_sequential(urls: List[str]) -> List[Dict[str, Any]]:
     """
@@ -120,14 +152,6 @@ def extract_ad_details_sequential(urls: List[str]) -> List[Dict[str, Any]]:
             # Small delay to be respectful to the server
             time.sleep(0.5)
         except Exception as e:
-            error_result = {
-                "ad_title": f"Error: {e}",
-                "price_lkr": "Error",
-                "location": "Error",
-                "mileage_km": "Error",
-                "year": "Error",
-                "url": url
-            }
-            results.append(error_result)
+            results.append(_error_result(url, e))
     
     return results
@@ -0,0 +1,14 @@
+# app/utils/vehicle_names.py
+import re
+from functools import lru_cache
+
+_VEHICLE_NAME_NOISE_RE = re.compile(r'[^a-z0-9 ]')
+
+@lru_cache(maxsize=256)
+def canonicalize_vehicle(name: str) -> str:
+    """Lowercase, drop punctuation and sort tokens so "Toyota Aqua 2015" and "aqua toyota-2015" match."""
+    return " ".join(sorted(_VEHICLE_NAME_NOISE_RE.sub(' ', name.lower()).split()))
+
+def comparison_pair_key(vehicle1: str, vehicle2: str) -> str:
+    """Order- and spelling-insensitive key for a vehicle pair, used to look up stored comparisons."""
+    return " | ".join(sorted((canonicalize_vehicle(vehicle1 or ""), canonicalize_vehicle(vehicle2 or ""))))